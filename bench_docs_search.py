@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark DocsIndex.search on random embedding matrices
+
+Writes random text-embedding-3-large sized matrices with save_embedding_matrix,
+loads them the way docs_search_server does and times queries using every
+dimension and a truncated prefix. Run from the repository root:
+
+    python bench_docs_search.py | tee bench_output.txt
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+# docs_search_server builds its OpenAI client on import; the benchmark never calls it
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+from embedding_store import save_embedding_matrix
+from docs_search_server import DocsIndex
+
+DIMENSION = 3072  # text-embedding-3-large
+FILL_ROWS = 10000  # Rows generated at a time, so the float64 scratch space stays small
+
+
+def build_matrix(base_path: str, rows: int, seed: int) -> float:
+    """Write a random matrix and its metadata, returning the seconds taken"""
+    rng = np.random.default_rng(seed)
+    vectors = np.empty((rows, DIMENSION), dtype=np.float32)
+    for start in range(0, rows, FILL_ROWS):
+        stop = min(start + FILL_ROWS, rows)
+        vectors[start:stop] = rng.standard_normal((stop - start, DIMENSION), dtype=np.float32)
+    metadata = [{"text": f"chunk {i}", "filename": f"doc-{i % 100}.md", "chunk_index": i} for i in range(rows)]
+
+    started = time.perf_counter()
+    save_embedding_matrix(base_path, vectors, metadata)
+    return time.perf_counter() - started
+
+
+def time_queries(index: DocsIndex, queries: np.ndarray, top_k: int, dimensions=None, filename=None) -> dict:
+    """Time one search per query; the first runs cold (row norms for the prefix not cached yet)"""
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, top_k, dimensions=dimensions, filename=filename)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    warm = sorted(timings[1:]) or timings
+    return {
+        "first_ms": timings[0],
+        "median_ms": statistics.median(warm),
+        "p95_ms": warm[min(len(warm) - 1, int(len(warm) * 0.95))],
+        "qps": 1000 / statistics.mean(warm)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DocsIndex.search on random embedding matrices")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Chunk counts to benchmark")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[256], help="Truncated dimension counts to compare with the full 3072")
+    parser.add_argument("--queries", type=int, default=50, help="Queries per configuration")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dir", help="Directory for the matrices (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"numpy {np.__version__}, {os.cpu_count()} CPUs, {args.queries} queries per row, top_k={args.top_k}")
+    print(f"{'chunks':>8} {'dims':>5} {'filter':>7} {'first ms':>9} {'median ms':>10} {'p95 ms':>8} {'queries/s':>10}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        for rows in args.sizes:
+            base_path = os.path.join(workdir, f"bench_{rows}")
+            write_seconds = build_matrix(base_path, rows, args.seed)
+
+            started = time.perf_counter()
+            index = DocsIndex(base_path)
+            load_seconds = time.perf_counter() - started
+            size_mb = os.path.getsize(base_path + ".npy") / 1024 ** 2
+            print(f"# {rows} chunks: {size_mb:.0f} MB matrix, written in {write_seconds:.2f}s, "
+                  f"loaded with full-dimension norms in {load_seconds:.2f}s")
+
+            queries = np.random.default_rng(args.seed + 1).standard_normal((args.queries, DIMENSION), dtype=np.float32)
+            configurations = [(None, None)] + [(dims, None) for dims in args.dimensions] + [(None, "doc-7.md")]
+            for dimensions, filename in configurations:
+                result = time_queries(index, queries, args.top_k, dimensions, filename)
+                print(f"{rows:>8} {dimensions or DIMENSION:>5} {'file' if filename else '-':>7} "
+                      f"{result['first_ms']:>9.2f} {result['median_ms']:>10.2f} {result['p95_ms']:>8.2f} {result['qps']:>10.1f}")
+
+            # Drop the memory map before the directory is removed
+            del index
+
+
+if __name__ == "__main__":
+    main()
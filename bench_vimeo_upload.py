@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory use of TUS chunk uploads
+
+Uploads a sparse multi-GB file to a local TUS stand-in, once through
+vimeo_server._tus_upload_chunks (chunks served from an mmap) and once through
+the previous loop that read every chunk into a bytes object with f.read.
+Each run happens in its own process and reports:
+
+- the tracemalloc peak (Python allocations, where f.read chunks show up)
+- the peak anonymous RSS (process memory not backed by the file)
+- the peak file-backed RSS (mapped pages of the video, reclaimable page cache)
+- ru_maxrss
+
+Run from the repository root:
+
+    python bench_vimeo_upload.py | tee bench_output.txt
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import resource
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+MB = 1024 ** 2
+SAMPLE_INTERVAL = 0.005  # Seconds between /proc/self/status samples
+
+
+# ===== TUS STAND-IN =====
+
+class TusStandIn(BaseHTTPRequestHandler):
+    """Accepts TUS PATCH requests, discarding the body and tracking the offset per upload link"""
+
+    offsets = {}
+
+    def do_PATCH(self):
+        offset = self.offsets.get(self.path, 0)
+        if int(self.headers.get("Upload-Offset", -1)) != offset:
+            self.send_response(409)
+            self.end_headers()
+            return
+
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            block = self.rfile.read(min(remaining, 65536))
+            if not block:
+                break
+            remaining -= len(block)
+            offset += len(block)
+        self.offsets[self.path] = offset
+
+        self.send_response(204)
+        self.send_header("Tus-Resumable", "1.0.0")
+        self.send_header("Upload-Offset", str(offset))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_tus_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TusStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ===== UPLOAD PATHS =====
+
+def upload_with_read(upload_link: str, file_path: str, file_size: int, chunk_size: int) -> dict:
+    """The upload loop before chunks were served from an mmap: one f.read bytes object per PATCH"""
+    offset = 0
+    with open(file_path, 'rb') as f:
+        while offset < file_size:
+            f.seek(offset)
+            data = f.read(chunk_size)
+
+            patch_headers = {
+                "Tus-Resumable": "1.0.0",
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream"
+            }
+
+            response = requests.patch(upload_link, headers=patch_headers, data=data)
+            if response.status_code != 204:
+                return {"error": f"Upload failed at offset {offset}: {response.status_code}"}
+            offset = int(response.headers.get("Upload-Offset", offset))
+
+    return {"success": True, "offset": offset}
+
+
+def upload_with_mmap(upload_link: str, file_path: str, file_size: int, chunk_size: int) -> dict:
+    import vimeo_server
+
+    # One log line per chunk would dominate the run
+    logging.getLogger("vimeo-mcp-server").setLevel(logging.WARNING)
+    return vimeo_server._tus_upload_chunks(upload_link, file_path, file_size, chunk_size)
+
+
+UPLOADERS = {"read": upload_with_read, "mmap": upload_with_mmap}
+
+
+# ===== MEASUREMENT =====
+
+def read_rss() -> dict:
+    """Current RssAnon and RssFile in bytes (Linux only, empty elsewhere)"""
+    rss = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    name, value, _ = line.split()
+                    rss[name.rstrip(":")] = int(value) * 1024
+    except OSError:
+        pass
+    return rss
+
+
+class RssSampler(threading.Thread):
+    """Track the highest RssAnon and RssFile seen while running"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peaks = read_rss()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            for name, value in read_rss().items():
+                self.peaks[name] = max(self.peaks.get(name, 0), value)
+
+    def stop(self) -> dict:
+        self.stopped.set()
+        self.join()
+        return self.peaks
+
+
+def measure(mode: str, upload_link: str, file_path: str, chunk_size: int) -> dict:
+    """Run one upload in this process and return its memory and timing figures"""
+    file_size = os.path.getsize(file_path)
+    # Import everything the upload needs before taking the baseline
+    if mode == "mmap":
+        importlib.import_module("vimeo_server")
+    baseline = read_rss()
+
+    sampler = RssSampler()
+    sampler.start()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = UPLOADERS[mode](upload_link, file_path, file_size, chunk_size)
+    seconds = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peaks = sampler.stop()
+
+    if "error" in result or result["offset"] != file_size:
+        raise SystemExit(f"{mode} upload did not complete: {result}")
+
+    return {
+        "mode": mode,
+        "chunk_mb": chunk_size / MB,
+        "seconds": seconds,
+        "mb_per_sec": file_size / MB / seconds,
+        "tracemalloc_peak_mb": traced_peak / MB,
+        "anon_rss_growth_mb": (peaks.get("RssAnon", 0) - baseline.get("RssAnon", 0)) / MB,
+        "file_rss_peak_mb": peaks.get("RssFile", 0) / MB,
+        # KB on Linux, bytes on macOS
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024) / MB
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory use of TUS chunk uploads")
+    parser.add_argument("--size-gb", type=float, default=4, help="Size of the sparse test file")
+    parser.add_argument("--chunk-mb", type=int, nargs="+", default=[1, 64], help="TUS chunk sizes to compare")
+    parser.add_argument("--dir", help="Directory for the sparse file (default: a temporary directory, removed afterwards)")
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "URL", "FILE", "CHUNK_BYTES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, url, file_path, chunk_size = args.child
+        print(json.dumps(measure(mode, url, file_path, int(chunk_size))))
+        return
+
+    server = start_tus_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    file_size = int(args.size_gb * 1024 ** 3)
+
+    print(f"{args.size_gb:g} GB sparse file, uploads to a local TUS stand-in, one process per run")
+    print(f"{'path':>5} {'chunk MB':>9} {'seconds':>8} {'MB/s':>7} {'tracemalloc MB':>15} {'anon RSS +MB':>13} {'file RSS MB':>12} {'maxrss MB':>10}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        file_path = os.path.join(workdir, "video.mp4")
+        with open(file_path, "wb") as f:
+            f.truncate(file_size)
+
+        for chunk_mb in args.chunk_mb:
+            for mode in UPLOADERS:
+                upload_link = f"{base_url}/upload/{mode}-{chunk_mb}"
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, upload_link, file_path, str(chunk_mb * MB)],
+                    check=True, stdout=subprocess.PIPE, text=True
+                ).stdout
+                row = json.loads(output.strip().splitlines()[-1])
+                print(f"{row['mode']:>5} {row['chunk_mb']:>9g} {row['seconds']:>8.1f} {row['mb_per_sec']:>7.0f} "
+                      f"{row['tracemalloc_peak_mb']:>15.1f} {row['anon_rss_growth_mb']:>13.1f} "
+                      f"{row['file_rss_peak_mb']:>12.1f} {row['max_rss_mb']:>10.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Docs Search MCP Server
+Semantic search over the project docs using the embeddings written by generate_embeddings.py
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from mcp.server.fastmcp import FastMCP
+from openai import AsyncOpenAI
+
+from embedding_store import load_embedding_matrix
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("docs-search-mcp-server")
+
+DOCS_EMBEDDINGS_PATH = os.getenv("DOCS_EMBEDDINGS_PATH", "docs_embeddings")  # Without extension, as written by generate_embeddings.py
+EMBEDDING_MODEL = "text-embedding-3-large"  # Must match the model used by generate_embeddings.py
+MAX_TOP_K = 50
+
+openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Create FastMCP server with stateless HTTP for FastAPI mounting
+mcp = FastMCP("docs-search", stateless_http=True)
+
+
+class DocsIndex:
+    """Embedding matrix memory-mapped from disk with cached row norms per dimension count
+
+    Rows are never copied or normalized in place: cosine scores are the dot products
+    divided by the row norms, so the matrix stays a read-only view of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors, self.metadata = load_embedding_matrix(path)
+        self.filenames = np.array([row["filename"] for row in self.metadata])
+        self.loaded_at = time.time()
+        self._norms: Dict[int, np.ndarray] = {}
+        self.norms(self.dimension)
+
+    @property
+    def size(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def norms(self, dimensions: int) -> np.ndarray:
+        if dimensions not in self._norms:
+            norms = np.linalg.norm(self.vectors[:, :dimensions], axis=1)
+            # Zero rows score 0 instead of dividing by zero
+            norms[norms == 0] = 1.0
+            self._norms[dimensions] = norms
+        return self._norms[dimensions]
+
+    def search(self, query: np.ndarray, top_k: int, dimensions: Optional[int] = None, filename: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k rows by cosine similarity, optionally using only the first dimensions of each vector
+
+        text-embedding-3 vectors are trained so a prefix renormalized to unit length
+        is still a usable embedding, trading some accuracy for less work per query.
+        """
+        dimensions = min(dimensions or self.dimension, self.dimension)
+        query = np.asarray(query[:dimensions], dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        scores = (self.vectors[:, :dimensions] @ query) / self.norms(dimensions)
+        if filename:
+            scores = np.where(self.filenames == filename, scores, -np.inf)
+
+        top_k = min(top_k, self.size)
+        # Partial sort: only the top_k candidates are ordered
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        return [
+            {"score": round(float(scores[row]), 4), **self.metadata[row]}
+            for row in ranked
+            if np.isfinite(scores[row])
+        ]
+
+
+DOCS_INDEX: Optional[DocsIndex] = None
+
+
+def load_docs_index() -> DocsIndex:
+    """Load the index from DOCS_EMBEDDINGS_PATH, replacing the current one"""
+    global DOCS_INDEX
+    DOCS_INDEX = DocsIndex(DOCS_EMBEDDINGS_PATH)
+    logger.info(f"Loaded {DOCS_INDEX.size} doc chunks ({DOCS_INDEX.dimension} dimensions) from {DOCS_EMBEDDINGS_PATH}")
+    return DOCS_INDEX
+
+
+@contextlib.asynccontextmanager
+async def run_docs_index():
+    """Load the index when the hub starts, so the first query does not pay for it"""
+    try:
+        await asyncio.to_thread(load_docs_index)
+    except (FileNotFoundError, ValueError) as e:
+        logger.warning(f"Docs index not loaded, run generate_embeddings.py first: {e}")
+    yield
+
+
+@mcp.tool()
+async def search_docs(query: str, top_k: int = 5, dimensions: Optional[int] = None, filename: Optional[str] = None) -> Dict:
+    """
+    Find the doc chunks most similar in meaning to a query
+
+    Args:
+        query: What to search for, in natural language
+        top_k: Number of chunks to return (default 5, max 50)
+        dimensions: Compare only the first N dimensions, e.g. 256 or 1024, for faster, coarser search (optional)
+        filename: Only search this file, e.g. "docs/mailgun.md" (optional)
+
+    Returns:
+        Matching chunks with cosine score, text, filename and chunk position
+    """
+    try:
+        index = DOCS_INDEX or await asyncio.to_thread(load_docs_index)
+    except (FileNotFoundError, ValueError) as e:
+        return {"error": f"Docs index not available, run generate_embeddings.py first: {e}"}
+
+    if not index.size:
+        return {"query": query, "results": []}
+    if dimensions is not None and dimensions < 1:
+        return {"error": "dimensions must be positive"}
+
+    try:
+        response = await openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
+    except Exception as e:
+        return {"error": f"Failed to embed query: {str(e)}"}
+
+    started = time.perf_counter()
+    results = await asyncio.to_thread(
+        index.search,
+        np.array(response.data[0].embedding, dtype=np.float32),
+        max(1, min(top_k, MAX_TOP_K)),
+        dimensions,
+        filename
+    )
+
+    return {
+        "query": query,
+        "dimensions": min(dimensions or index.dimension, index.dimension),
+        "search_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": results
+    }
+
+
+@mcp.tool()
+async def reload_docs_index() -> Dict:
+    """
+    Reload the docs index after generate_embeddings.py has been run again
+
+    Returns:
+        Number of chunks, dimensions and files in the new index
+    """
+    try:
+        index = await asyncio.to_thread(load_docs_index)
+    except (FileNotFoundError, ValueError) as e:
+        return {"error": f"Failed to load docs index: {str(e)}"}
+
+    return {
+        "path": DOCS_EMBEDDINGS_PATH,
+        "chunks": index.size,
+        "dimension": index.dimension,
+        "files": sorted(set(index.filenames.tolist()))
+    }
+
+
+if __name__ == "__main__":
+    mcp.run(transport="streamable-http")
@@ -0,0 +1,189 @@
+"""
+On-disk storage for document embeddings
+
+Vectors are kept as raw float32 rows in a memory-mapped file with a JSON index
+next to it, so loading a cache or an embedding matrix never parses floats as text.
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path: Path, data) -> None:
+    """Write then rename so a crash never leaves a truncated file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingCache:
+    """Vectors for one model keyed by the SHA-256 of the embedded text
+
+    Rows are appended to a <model>*.f32 file and located through <model>.index.json,
+    which names the vector file and maps each hash to its row.
+    """
+
+    def __init__(self, root: str, model: str):
+        self.path = Path(root)
+        self.model = model
+        self.index_path = self.path / f"{model}.index.json"
+        self.vectors_path = self.path / f"{model}.f32"
+
+        self.dimension = None
+        self.rows: Dict[str, int] = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                index = json.load(f)
+            self.dimension = index["dimension"]
+            self.rows = index["rows"]
+            self.vectors_path = self.path / index["vectors_file"]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _vectors(self) -> np.ndarray:
+        row_count = max(self.rows.values()) + 1 if self.rows else 0
+        if not row_count:
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, self.dimension))
+
+    def get_many(self, keys: Sequence[str]) -> np.ndarray:
+        """Vectors for the keys as one (len(keys), dimension) float32 array"""
+        missing = [key for key in keys if key not in self.rows]
+        if missing:
+            raise KeyError(f"{len(missing)} keys are not cached")
+        return np.array(self._vectors()[[self.rows[key] for key in keys]], dtype=np.float32)
+
+    def add(self, keys: Sequence[str], vectors: Iterable[Sequence[float]]) -> None:
+        """Append new vectors and persist the index, skipping keys already cached"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {vectors.shape[1]}")
+
+        # Keep the first copy when the same text appears twice in one call
+        new, seen = [], set(self.rows)
+        for i, key in enumerate(keys):
+            if key not in seen:
+                seen.add(key)
+                new.append(i)
+        if not new:
+            return
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        next_row = max(self.rows.values()) + 1 if self.rows else 0
+        with open(self.vectors_path, "ab") as f:
+            # Drop rows written by a run that crashed before saving the index
+            f.truncate(next_row * self.dimension * 4)
+            f.write(vectors[new].tobytes())
+        for offset, i in enumerate(new):
+            self.rows[keys[i]] = next_row + offset
+        self._save_index()
+
+    def compact(self, live_keys: Iterable[str]) -> int:
+        """Rewrite the vector file without rows for dead keys once they outnumber live ones
+
+        Returns the number of rows dropped.
+        """
+        live = [key for key in dict.fromkeys(live_keys) if key in self.rows]
+        dead = len(self.rows) - len(live)
+        if dead <= len(live):
+            return 0
+
+        # Write a new vector file and switch the index to it, so the index always
+        # names a file whose rows match it
+        vectors = self.get_many(live)
+        old_path = self.vectors_path
+        self.vectors_path = self.path / f"{self.model}-{time.time_ns()}.f32"
+        with open(self.vectors_path, "wb") as f:
+            f.write(vectors.tobytes())
+        self.rows = {key: row for row, key in enumerate(live)}
+        self._save_index()
+        old_path.unlink(missing_ok=True)
+        return dead
+
+    def _save_index(self) -> None:
+        write_json_atomic(self.index_path, {
+            "model": self.model,
+            "dimension": self.dimension,
+            "vectors_file": self.vectors_path.name,
+            "rows": self.rows,
+        })
+
+
+def diff_manifest(previous: Dict[str, str], current: Dict[str, str]) -> Dict[str, List[str]]:
+    """Compare {chunk id: content hash} maps from two runs"""
+    return {
+        "new": [chunk_id for chunk_id in current if chunk_id not in previous],
+        "changed": [chunk_id for chunk_id, key in current.items() if chunk_id in previous and previous[chunk_id] != key],
+        "unchanged": [chunk_id for chunk_id, key in current.items() if previous.get(chunk_id) == key],
+        "deleted": [chunk_id for chunk_id in previous if chunk_id not in current],
+    }
+
+
+def load_manifest(path: Path) -> Dict[str, str]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)["chunks"]
+
+
+def save_manifest(path: Path, model: str, chunks: Dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(path, {"model": model, "chunks": chunks})
+
+
+def save_embedding_matrix(base_path: str, vectors: np.ndarray, metadata: List[Dict[str, Any]]) -> Tuple[Path, Path]:
+    """Write vectors as <base>.npy (float32) and one JSON line of metadata per row to <base>.jsonl"""
+    if len(vectors) != len(metadata):
+        raise ValueError(f"{len(vectors)} vectors but {len(metadata)} metadata rows")
+
+    base = Path(base_path)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    matrix_path, metadata_path = base.with_suffix(".npy"), base.with_suffix(".jsonl")
+
+    tmp_matrix = matrix_path.with_name("tmp-" + matrix_path.name)
+    matrix = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=np.float32, shape=np.shape(vectors))
+    matrix[:] = vectors
+    matrix.flush()
+    del matrix
+
+    tmp_metadata = metadata_path.with_name("tmp-" + metadata_path.name)
+    with open(tmp_metadata, "w", encoding="utf-8") as f:
+        for row in metadata:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    os.replace(tmp_matrix, matrix_path)
+    os.replace(tmp_metadata, metadata_path)
+    return matrix_path, metadata_path
+
+
+def load_embedding_matrix(base_path: str) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Memory-map <base>.npy read-only and read its <base>.jsonl metadata
+
+    The vectors are not copied into memory; pages are read from disk on first access.
+    """
+    base = Path(base_path)
+    vectors = np.load(base.with_suffix(".npy"), mmap_mode="r")
+    with open(base.with_suffix(".jsonl"), encoding="utf-8") as f:
+        metadata = [json.loads(line) for line in f if line.strip()]
+    if len(metadata) != len(vectors):
+        raise ValueError(f"{base}: {len(vectors)} vectors but {len(metadata)} metadata rows")
+    return vectors, metadata
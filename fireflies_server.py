@@ -1,16 +1,54 @@
 from mcp.server.fastmcp import FastMCP
-import json, os, hmac, hashlib
+import json, os, hmac, hashlib, time, asyncio, logging, threading, contextlib
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from typing import Dict, List, Optional
 
+from fireflies_store import DetailCache, TranscriptArchive
+
 load_dotenv('.env')
 
+logger = logging.getLogger(__name__)
+
 # Initialize the MCP server with stateless HTTP for FastAPI mounting
 mcp = FastMCP("FirefliesServer", stateless_http=True)
 FIREFLIES_API_KEY = os.getenv("FIREFLIES_API_KEY")
 API_ENDPOINT = "https://api.fireflies.ai/graphql"
 
+# Local transcript archive for full-text search
+FIREFLIES_ARCHIVE_PATH = os.getenv("FIREFLIES_ARCHIVE_PATH", "fireflies_archive.db")
+FIREFLIES_PAGE_SIZE = 50  # Fireflies' maximum transcripts per request
+FIREFLIES_SYNC_CONCURRENCY = 4  # Transcripts fetched in parallel while syncing
+ARCHIVE: Optional[TranscriptArchive] = None
+
+# Incremental sync of transcript listings, read tools answer from the cache while it is fresh
+FIREFLIES_SYNC_INTERVAL = int(os.getenv("FIREFLIES_SYNC_INTERVAL", "300"))  # Seconds between background syncs
+FIREFLIES_CACHE_MAX_AGE = int(os.getenv("FIREFLIES_CACHE_MAX_AGE", "600"))  # Older cache triggers a sync before reading
+FIREFLIES_SYNC_BACKFILL = int(os.getenv("FIREFLIES_SYNC_BACKFILL", "500"))  # Transcripts pulled by the first sync
+FIREFLIES_SYNC_LOOKBACK_MS = 24 * 3600 * 1000  # Re-check this far behind the watermark for late-processed meetings
+FIREFLIES_LISTING_MAX_AGE = int(os.getenv("FIREFLIES_LISTING_MAX_AGE", str(24 * 3600)))  # Cached listings older than this are misses
+FIREFLIES_SYNC_ARCHIVE_MAX = int(os.getenv("FIREFLIES_SYNC_ARCHIVE_MAX", "20"))  # Newest transcripts each sync archives, 0 turns it off
+FIREFLIES_SYNC_ARCHIVE_DELAY = float(os.getenv("FIREFLIES_SYNC_ARCHIVE_DELAY", "2"))  # Seconds between transcript fetches of a sync
+SYNC_LOCK = threading.Lock()
+SYNC_STOP = threading.Event()
+SYNC_TASK: Optional[asyncio.Task] = None
+
+# Full transcript payloads, compressed, kept in memory and in the archive database
+FIREFLIES_DETAIL_CACHE_MB = int(os.getenv("FIREFLIES_DETAIL_CACHE_MB", "64"))  # In-memory LRU budget
+FIREFLIES_DETAIL_DISK_MB = int(os.getenv("FIREFLIES_DETAIL_DISK_MB", "512"))  # On-disk budget
+DETAIL_CACHE: Optional[DetailCache] = None
+
+# Batched transcript queries, one aliased transcript(id:) per ID in a single GraphQL document
+FIREFLIES_BATCH_MAX_COST = int(os.getenv("FIREFLIES_BATCH_MAX_COST", "1000"))  # Estimated cost per request, see transcript_cost()
+FIREFLIES_BATCH_MAX_TRANSCRIPTS = 10  # Transcripts per request whatever their cost
+FIREFLIES_BATCH_CONCURRENCY = 4  # Requests in flight at once
+
+# Team user directory, refreshed from the users query when older than the TTL
+FIREFLIES_USER_CACHE_TTL = int(os.getenv("FIREFLIES_USER_CACHE_TTL", "600"))
+FIREFLIES_USER_MISS_REFRESH = 60  # A lookup miss reloads the directory at most this often, for newly added users
+
 # Headers for Fireflies API requests
 def get_headers():
     return {
@@ -19,8 +57,12 @@ def get_headers():
     }
 
 # Helper function to make GraphQL requests to Fireflies API
-def fireflies_request(query: str, variables: Dict = None) -> Dict:
-    """Make a GraphQL request to the Fireflies API"""
+def fireflies_request(query: str, variables: Dict = None, allow_partial: bool = False) -> Dict:
+    """Make a GraphQL request to the Fireflies API
+    
+    With allow_partial, a response that has both data and errors returns the data
+    with the errors under "errors" instead of failing as a whole.
+    """
     try:
         data = {"query": query}
         if variables:
@@ -31,6 +73,8 @@ def fireflies_request(query: str, variables: Dict = None) -> Dict:
         if response.status_code == 200:
             result = response.json()
             if "errors" in result:
+                if allow_partial and result.get("data"):
+                    return {**result["data"], "errors": result["errors"]}
                 return {"error": f"GraphQL errors: {result['errors']}"}
             return result.get("data", {})
         else:
@@ -38,6 +82,131 @@ def fireflies_request(query: str, variables: Dict = None) -> Dict:
     except Exception as e:
         return {"error": f"Request failed: {str(e)}"}
 
+# Transcript fields that tools may select, nested dicts are object types
+TRANSCRIPT_SCHEMA: Dict = {
+    "id": None, "title": None, "date": None, "dateString": None, "duration": None,
+    "organizer_email": None, "participants": None,
+    "transcript_url": None, "audio_url": None, "video_url": None,
+    "user": {"user_id": None, "name": None, "email": None},
+    "speakers": {"id": None, "name": None},
+    "sentences": {
+        "index": None, "speaker_name": None, "speaker_id": None,
+        "text": None, "start_time": None, "end_time": None,
+    },
+    "summary": {
+        "keywords": None, "action_items": None, "outline": None, "overview": None,
+        "short_summary": None, "meeting_type": None, "topics_discussed": None,
+    },
+    "analytics": {
+        "sentiments": {"negative_pct": None, "neutral_pct": None, "positive_pct": None},
+        "speakers": {
+            "speaker_id": None, "name": None, "duration": None, "word_count": None,
+            "longest_monologue": None, "filler_words": None, "questions": None,
+        },
+    },
+}
+
+def schema_paths(node: Dict, prefix: str = "") -> List[str]:
+    """Every leaf field path under a schema node, such as summary.overview"""
+    paths = []
+    for name, child in node.items():
+        path = prefix + name
+        paths.extend(schema_paths(child, path + ".") if child else [path])
+    return paths
+
+# Field paths selected by each tool by default, "summary.overview" selects overview inside summary
+LIGHT_TRANSCRIPT_FIELDS = ["id", "title", "date"]
+MY_TRANSCRIPT_FIELDS = [
+    "id", "title", "date", "duration", "organizer_email", "participants",
+    "transcript_url", "audio_url", "video_url",
+    "summary.keywords", "summary.action_items", "summary.overview", "summary.short_summary", "summary.meeting_type",
+]
+LATEST_TRANSCRIPT_FIELDS = MY_TRANSCRIPT_FIELDS + ["summary.topics_discussed"]
+SEARCH_TRANSCRIPT_FIELDS = [
+    "id", "title", "date", "duration", "organizer_email", "participants",
+    "summary.overview", "summary.short_summary", "summary.meeting_type",
+]
+TEAM_TRANSCRIPT_FIELDS = [
+    "id", "title", "date", "duration", "organizer_email", "participants",
+    "user.name", "user.email", "summary.overview", "summary.meeting_type",
+]
+# Object fields that are lists, each of their fields is returned once per entry
+TRANSCRIPT_LIST_FIELDS = ("speakers", "sentences", "analytics.speakers")
+LIST_FIELD_COST = 20
+FULL_TRANSCRIPT_FIELDS = [path for path in schema_paths(TRANSCRIPT_SCHEMA) if not path.startswith("user.")]
+# The sync caches every field any listing tool returns by default, plus the owner for "mine"
+LISTING_FIELDS = list(dict.fromkeys(
+    LATEST_TRANSCRIPT_FIELDS + SEARCH_TRANSCRIPT_FIELDS + TEAM_TRANSCRIPT_FIELDS + ["user.user_id"]
+))
+
+def resolve_fields(fields: Optional[List[str]], light: bool, default: List[str]) -> List[str]:
+    """Validate a requested projection against TRANSCRIPT_SCHEMA and expand it to leaf paths
+    
+    An object name such as "summary" selects all of its fields. The id is always included.
+    Raises ValueError for unknown fields.
+    """
+    if light:
+        return LIGHT_TRANSCRIPT_FIELDS
+    if not fields:
+        return default
+    
+    paths = ["id"]
+    for field in fields:
+        node: Optional[Dict] = TRANSCRIPT_SCHEMA
+        for name in field.split("."):
+            if not isinstance(node, dict) or name not in node:
+                raise ValueError(
+                    f"Unknown transcript field '{field}'. Valid fields: {', '.join(schema_paths(TRANSCRIPT_SCHEMA))}"
+                )
+            node = node[name]
+        paths.extend(schema_paths(node, field + ".") if node else [field])
+    return list(dict.fromkeys(paths))
+
+def field_tree(paths: List[str]) -> Dict:
+    tree: Dict = {}
+    for path in paths:
+        node = tree
+        for name in path.split("."):
+            node = node.setdefault(name, {})
+    return tree
+
+def graphql_selection(paths: List[str]) -> str:
+    """Build a GraphQL selection set such as "{ id summary { overview } }" from field paths"""
+    def render(node: Dict) -> str:
+        return "{ " + " ".join(name + (" " + render(child) if child else "") for name, child in node.items()) + " }"
+    
+    return render(field_tree(paths))
+
+def project(item: Dict, paths: List[str]) -> Dict:
+    """Keep only the given field paths of a transcript, as the live API would return them"""
+    def select(value, node: Dict):
+        if not node:
+            return value
+        if isinstance(value, list):
+            return [select(entry, node) for entry in value]
+        if not isinstance(value, dict):
+            return value
+        return {name: select(value[name], child) for name, child in node.items() if name in value}
+    
+    return select(item, field_tree(paths))
+
+def get_archive() -> TranscriptArchive:
+    """Open the transcript archive on first use"""
+    global ARCHIVE
+    if ARCHIVE is None:
+        ARCHIVE = TranscriptArchive(FIREFLIES_ARCHIVE_PATH)
+    return ARCHIVE
+
+def get_detail_cache() -> DetailCache:
+    global DETAIL_CACHE
+    if DETAIL_CACHE is None:
+        DETAIL_CACHE = DetailCache(
+            get_archive(),
+            memory_bytes=FIREFLIES_DETAIL_CACHE_MB * 1024 * 1024,
+            disk_bytes=FIREFLIES_DETAIL_DISK_MB * 1024 * 1024,
+        )
+    return DETAIL_CACHE
+
 # ===== USER MANAGEMENT TOOLS =====
 
 @mcp.tool()
@@ -96,19 +265,10 @@ def get_all_team_users() -> Dict:
     """
     return fireflies_request(query)
 
-@mcp.tool()
-def get_user_by_email(email: str) -> Dict:
-    """
-    Get user details by email (searches through team users)
+class UserDirectory:
+    """Team users indexed by lowercase email and by user_id, reloaded when older than ttl"""
     
-    Args:
-        email: User's email address
-        
-    Returns:
-        User details if found
-    """
-    # First get all users, then filter by email
-    users_result = fireflies_request("""
+    QUERY = """
     {
         users {
             user_id
@@ -121,224 +281,670 @@ def get_user_by_email(email: str) -> Dict:
             integrations
         }
     }
-    """)
+    """
     
-    if "error" in users_result:
-        return users_result
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.by_email: Dict[str, Dict] = {}
+        self.by_id: Dict[str, Dict] = {}
+        self.loaded_at: Optional[float] = None
     
-    users = users_result.get("users", [])
-    for user in users:
-        if user.get("email", "").lower() == email.lower():
-            return {"user": user}
+    def refresh(self, max_age: float = 0) -> Optional[str]:
+        """Reload unless loaded within max_age seconds, returning an error message on failure"""
+        with self._lock:
+            # Another thread may have reloaded while this one waited for the lock
+            if self.loaded_at is not None and time.time() - self.loaded_at < max_age:
+                return None
+            result = fireflies_request(self.QUERY)
+            if "error" in result:
+                return result["error"]
+            users = result.get("users") or []
+            self.by_email = {user["email"].lower(): user for user in users if user.get("email")}
+            self.by_id = {user["user_id"]: user for user in users if user.get("user_id")}
+            self.loaded_at = time.time()
+            return None
+    
+    def ensure_fresh(self) -> Optional[str]:
+        """Reload if stale; a failed reload keeps serving the previous users when there are any"""
+        error = self.refresh(max_age=self.ttl)
+        if error and self.loaded_at is not None:
+            logger.warning(f"Fireflies user directory reload failed, serving cached users: {error}")
+            return None
+        return error
+    
+    def find(self, emails: List[str] = (), user_ids: List[str] = ()) -> Dict[str, Optional[Dict]]:
+        """Users for each email and user_id, None where not found, reloading once on a miss"""
+        def lookup() -> Dict[str, Optional[Dict]]:
+            found = {email: self.by_email.get(email.strip().lower()) for email in emails}
+            found.update({user_id: self.by_id.get(user_id) for user_id in user_ids})
+            return found
+        
+        found = lookup()
+        if None in found.values() and not self.refresh(max_age=FIREFLIES_USER_MISS_REFRESH):
+            found = lookup()
+        return found
+
+USER_DIRECTORY = UserDirectory(FIREFLIES_USER_CACHE_TTL)
+
+@mcp.tool()
+def get_user_by_email(email: str) -> Dict:
+    """
+    Get user details by email (searches through team users)
+    
+    Args:
+        email: User's email address
+        
+    Returns:
+        User details if found
+    """
+    error = USER_DIRECTORY.ensure_fresh()
+    if error:
+        return {"error": error}
+    
+    user = USER_DIRECTORY.find(emails=[email])[email]
+    if user:
+        return {"user": user}
     
     return {"error": f"User with email {email} not found"}
 
+@mcp.tool()
+def get_users_by_emails(emails: List[str], user_ids: Optional[List[str]] = None) -> Dict:
+    """
+    Look up many team users at once, e.g. to map meeting participants to users
+    
+    Args:
+        emails: Email addresses to look up (case-insensitive)
+        user_ids: Fireflies user IDs to look up as well (optional)
+        
+    Returns:
+        Users keyed by the email or user ID asked for, and the ones not found
+    """
+    error = USER_DIRECTORY.ensure_fresh()
+    if error:
+        return {"error": error}
+    
+    found = USER_DIRECTORY.find(emails=list(dict.fromkeys(emails)), user_ids=list(dict.fromkeys(user_ids or [])))
+    return {
+        "users": {key: user for key, user in found.items() if user},
+        "not_found": [key for key, user in found.items() if not user],
+    }
+
 # ===== SIMPLE TRANSCRIPT TOOLS =====
 
 @mcp.tool()
-def get_my_recent_transcripts(limit: int = 10) -> Dict:
+async def get_my_recent_transcripts(limit: int = 10, fields: Optional[List[str]] = None, light: bool = False) -> Dict:
     """
     Get your recent transcripts (owned by you)
     
     Args:
         limit: Number of transcripts to return (default 10, max 50)
+        fields: Fields to return, e.g. ["title", "summary.overview"] (optional, id is always included)
+        light: Return only id, title and date (default False)
         
     Returns:
         List of your recent transcripts
     """
-    query = """
-    query GetMyTranscripts($limit: Int) {
-        transcripts(mine: true, limit: $limit) {
-            id
-            title
-            date
-            duration
-            organizer_email
-            participants
-            transcript_url
-            audio_url
-            video_url
-            summary {
-                keywords
-                action_items
-                overview
-                short_summary
-                meeting_type
-            }
-        }
-    }
+    try:
+        paths = resolve_fields(fields, light, MY_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    limit = min(limit, 50)
+    cached = await asyncio.to_thread(cached_listings, limit, paths, mine=True)
+    if cached is not None:
+        return {"transcripts": [project(item, paths) for item in cached], "synced_at": get_archive().get_state("last_sync_at")}
+    
+    query = f"""
+    query GetMyTranscripts($limit: Int) {{
+        transcripts(mine: true, limit: $limit) {graphql_selection(paths)}
+    }}
     """
-    variables = {"limit": min(limit, 50)}
-    return fireflies_request(query, variables)
+    variables = {"limit": limit}
+    return await asyncio.to_thread(fireflies_request, query, variables)
+
 
 @mcp.tool()
-def get_latest_transcript() -> Dict:
+async def get_latest_transcript(fields: Optional[List[str]] = None) -> Dict:
     """
     Get the most recent transcript (yours)
     
+    Args:
+        fields: Fields to return, e.g. ["title", "summary.action_items"] (optional, id is always included)
+        
     Returns:
         Latest transcript with full details
     """
-    query = """
-    {
-        transcripts(mine: true, limit: 1) {
-            id
-            title
-            date
-            duration
-            organizer_email
-            participants
-            transcript_url
-            audio_url
-            video_url
-            summary {
-                keywords
-                action_items
-                overview
-                short_summary
-                meeting_type
-                topics_discussed
-            }
-        }
-    }
+    try:
+        paths = resolve_fields(fields, False, LATEST_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    cached = await asyncio.to_thread(cached_listings, 1, paths, mine=True)
+    if cached:
+        return {"transcript": project(cached[0], paths), "synced_at": get_archive().get_state("last_sync_at")}
+    
+    query = f"""
+    {{
+        transcripts(mine: true, limit: 1) {graphql_selection(paths)}
+    }}
     """
-    result = fireflies_request(query)
+    result = await asyncio.to_thread(fireflies_request, query)
     if "transcripts" in result and result["transcripts"]:
         return {"transcript": result["transcripts"][0]}
     return {"error": "No transcripts found"}
 
+
 @mcp.tool()
-def search_transcripts_by_title(title: str, limit: int = 10) -> Dict:
+async def search_transcripts_by_title(title: str, limit: int = 10, fields: Optional[List[str]] = None, light: bool = False) -> Dict:
     """
     Search transcripts by title
     
     Args:
         title: Title to search for (partial match)
         limit: Number of results to return
+        fields: Fields to return, e.g. ["title", "date", "participants"] (optional, id is always included)
+        light: Return only id, title and date (default False)
         
     Returns:
         List of matching transcripts
     """
-    query = """
-    query SearchTranscripts($title: String, $limit: Int) {
-        transcripts(title: $title, limit: $limit) {
-            id
-            title
-            date
-            duration
-            organizer_email
-            participants
-            summary {
-                overview
-                short_summary
-                meeting_type
-            }
-        }
-    }
+    try:
+        paths = resolve_fields(fields, light, SEARCH_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    cached = await asyncio.to_thread(cached_listings, limit, paths, title=title)
+    if cached is not None:
+        return {"transcripts": [project(item, paths) for item in cached], "synced_at": get_archive().get_state("last_sync_at")}
+    
+    query = f"""
+    query SearchTranscripts($title: String, $limit: Int) {{
+        transcripts(title: $title, limit: $limit) {graphql_selection(paths)}
+    }}
     """
     variables = {"title": title, "limit": limit}
-    return fireflies_request(query, variables)
+    return await asyncio.to_thread(fireflies_request, query, variables)
+
 
 @mcp.tool()
-def get_team_transcripts(limit: int = 10) -> Dict:
+async def get_team_transcripts(limit: int = 10, fields: Optional[List[str]] = None, light: bool = False) -> Dict:
     """
     Get recent transcripts from your entire team
     
     Args:
         limit: Number of transcripts to return
+        fields: Fields to return, e.g. ["title", "user.email"] (optional, id is always included)
+        light: Return only id, title and date (default False)
         
     Returns:
         List of team transcripts
     """
-    query = """
-    query GetTeamTranscripts($limit: Int) {
-        transcripts(limit: $limit) {
-            id
-            title
-            date
-            duration
-            organizer_email
-            participants
-            user {
-                name
-                email
-            }
-            summary {
-                overview
-                meeting_type
-            }
-        }
-    }
+    try:
+        paths = resolve_fields(fields, light, TEAM_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    cached = await asyncio.to_thread(cached_listings, limit, paths)
+    if cached is not None:
+        return {"transcripts": [project(item, paths) for item in cached], "synced_at": get_archive().get_state("last_sync_at")}
+    
+    query = f"""
+    query GetTeamTranscripts($limit: Int) {{
+        transcripts(limit: $limit) {graphql_selection(paths)}
+    }}
     """
     variables = {"limit": limit}
-    return fireflies_request(query, variables)
+    return await asyncio.to_thread(fireflies_request, query, variables)
+
 
 @mcp.tool()
-def get_transcript_full_details(transcript_id: str) -> Dict:
+def get_transcript_full_details(transcript_id: str, fields: Optional[List[str]] = None, refresh: bool = False) -> Dict:
     """
     Get complete transcript details including sentences and analytics
     
     Args:
         transcript_id: ID of the transcript (get this from other transcript tools)
+        fields: Fields to return, e.g. ["title", "summary", "sentences.text"] (optional, default all)
+        refresh: Skip the local cache and fetch from Fireflies again (default False)
         
     Returns:
         Complete transcript data with all details
     """
+    try:
+        paths = resolve_fields(fields, False, FULL_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    # A cached full transcript can answer any projection of it
+    cache = get_detail_cache()
+    if not refresh and set(paths) <= set(FULL_TRANSCRIPT_FIELDS):
+        cached = cache.get(transcript_id)
+        if cached is not None:
+            return {"transcript": project(cached["transcript"], paths)} if fields else cached
+    
+    query = f"""
+    query GetTranscript($transcriptId: String!) {{
+        transcript(id: $transcriptId) {graphql_selection(paths)}
+    }}
+    """
+    variables = {"transcriptId": transcript_id}
+    result = fireflies_request(query, variables)
+    # Only complete, processed transcripts are cached, they rarely change afterwards
+    transcript = result.get("transcript") if "error" not in result else None
+    if not fields and transcript and transcript.get("sentences"):
+        cache.put(transcript_id, result)
+    return result
+
+def transcript_cost(paths: List[str]) -> int:
+    """Rough cost of selecting these fields for one transcript
+    
+    A scalar field costs 1 and a field inside a list such as sentences costs
+    LIST_FIELD_COST, since it comes back once per sentence. The full selection
+    costs about 320, so a batch holds three full transcripts or many light ones.
+    """
+    return sum(
+        LIST_FIELD_COST if any(path.startswith(prefix + ".") for prefix in TRANSCRIPT_LIST_FIELDS) else 1
+        for path in paths
+    )
+
+def plan_batches(transcript_ids: List[str], paths: List[str]) -> List[List[str]]:
+    """Split IDs into batches that stay within the per-request cost and size budgets"""
+    per_request = max(1, min(FIREFLIES_BATCH_MAX_TRANSCRIPTS, FIREFLIES_BATCH_MAX_COST // transcript_cost(paths)))
+    return [transcript_ids[i:i + per_request] for i in range(0, len(transcript_ids), per_request)]
+
+def fetch_transcript_batch(transcript_ids: List[str], paths: List[str]) -> Dict[str, Dict]:
+    """Fetch transcripts with one aliased GraphQL document, returning a result or error per ID
+    
+    If Fireflies rejects the whole document, for example as too complex, the batch
+    is halved and retried down to single transcripts.
+    """
+    selection = graphql_selection(paths)
+    variables = {f"id{i}": transcript_id for i, transcript_id in enumerate(transcript_ids)}
+    query = (
+        "query GetTranscripts(" + ", ".join(f"$id{i}: String!" for i in range(len(transcript_ids))) + ") {\n"
+        + "\n".join(f"    t{i}: transcript(id: $id{i}) {selection}" for i in range(len(transcript_ids)))
+        + "\n}"
+    )
+    result = fireflies_request(query, variables, allow_partial=True)
+    
+    if "error" in result:
+        # Only a rejected document is worth splitting, not an outage or rate limit
+        rejected = result["error"].startswith(("GraphQL errors", "HTTP error: 4")) and not result["error"].startswith("HTTP error: 429")
+        if len(transcript_ids) == 1 or not rejected:
+            return {transcript_id: {"error": result["error"]} for transcript_id in transcript_ids}
+        half = len(transcript_ids) // 2
+        return {
+            **fetch_transcript_batch(transcript_ids[:half], paths),
+            **fetch_transcript_batch(transcript_ids[half:], paths),
+        }
+    
+    # Errors name the alias they belong to in their path
+    errors: Dict[str, List[str]] = {}
+    for error in result.get("errors", []):
+        alias = (error.get("path") or [None])[0]
+        errors.setdefault(alias, []).append(error.get("message", str(error)))
+    
+    results = {}
+    for i, transcript_id in enumerate(transcript_ids):
+        transcript = result.get(f"t{i}")
+        if transcript:
+            results[transcript_id] = {"transcript": transcript}
+        else:
+            messages = errors.get(f"t{i}") or errors.get(None) or ["Transcript not found"]
+            results[transcript_id] = {"error": "; ".join(messages)}
+    return results
+
+def load_transcripts_details(transcript_ids: List[str], paths: List[str], projected: bool, refresh: bool) -> Dict:
+    """Serve transcripts from the detail cache and fetch the rest in concurrent batches"""
+    transcript_ids = list(dict.fromkeys(transcript_ids))
+    results: Dict[str, Dict] = {}
+    cache = get_detail_cache()
+    if not refresh and set(paths) <= set(FULL_TRANSCRIPT_FIELDS):
+        for transcript_id in transcript_ids:
+            cached = cache.get(transcript_id)
+            if cached is not None:
+                results[transcript_id] = {"transcript": project(cached["transcript"], paths)} if projected else cached
+    cached_count = len(results)
+    
+    missing = [transcript_id for transcript_id in transcript_ids if transcript_id not in results]
+    batches = plan_batches(missing, paths)
+    with ThreadPoolExecutor(max_workers=FIREFLIES_BATCH_CONCURRENCY) as executor:
+        for batch_results in executor.map(lambda batch: fetch_transcript_batch(batch, paths), batches):
+            results.update(batch_results)
+    
+    if not projected:
+        for transcript_id in missing:
+            transcript = results[transcript_id].get("transcript")
+            if transcript and transcript.get("sentences"):
+                cache.put(transcript_id, results[transcript_id])
+    
+    return {
+        "transcripts": {transcript_id: results[transcript_id] for transcript_id in transcript_ids},
+        "cached": cached_count,
+        "batches": len(batches),
+    }
+
+@mcp.tool()
+async def get_transcripts_details(transcript_ids: List[str], fields: Optional[List[str]] = None, refresh: bool = False) -> Dict:
+    """
+    Get details of several transcripts at once, with far fewer round trips than one call per ID
+    
+    Args:
+        transcript_ids: IDs of the transcripts
+        fields: Fields to return, e.g. ["title", "summary"] (optional, default all as in get_transcript_full_details)
+        refresh: Skip the local cache and fetch from Fireflies again (default False)
+        
+    Returns:
+        Transcripts keyed by ID, each either {"transcript": ...} or {"error": ...}
+    """
+    try:
+        paths = resolve_fields(fields, False, FULL_TRANSCRIPT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    # The batches are fetched on a thread pool, keep the wait off the event loop
+    return await asyncio.to_thread(load_transcripts_details, transcript_ids, paths, bool(fields), refresh)
+
+# ===== TRANSCRIPT ARCHIVE TOOLS =====
+
+ARCHIVE_TRANSCRIPT_QUERY = """
+query ArchiveTranscript($transcriptId: String!) {
+    transcript(id: $transcriptId) {
+        id
+        title
+        date
+        duration
+        organizer_email
+        participants
+        speakers {
+            id
+            name
+        }
+        sentences {
+            index
+            speaker_name
+            speaker_id
+            text
+            start_time
+            end_time
+        }
+    }
+}
+"""
+
+def archive_transcript(transcript_id: str) -> Dict:
+    """Fetch one transcript with its sentences and store it in the archive"""
+    result = fireflies_request(ARCHIVE_TRANSCRIPT_QUERY, {"transcriptId": transcript_id})
+    if "error" in result:
+        return {"transcript_id": transcript_id, "error": result["error"]}
+    if not result.get("transcript"):
+        return {"transcript_id": transcript_id, "error": "Transcript not found"}
+    # Not processed yet; saving it now would mark it archived with nothing to search
+    if not result["transcript"].get("sentences"):
+        return {"transcript_id": transcript_id, "pending": True}
+    
+    sentences = get_archive().save(result["transcript"])
+    return {"transcript_id": transcript_id, "sentences": sentences}
+
+def archive_recent_transcripts(max_transcripts: int, mine: bool) -> Dict:
+    """List the most recent transcripts and archive the ones not archived yet, in parallel"""
     query = """
-    query GetTranscript($transcriptId: String!) {
-        transcript(id: $transcriptId) {
+    query ListTranscriptIds($limit: Int, $skip: Int, $mine: Boolean) {
+        transcripts(limit: $limit, skip: $skip, mine: $mine) {
             id
-            title
-            date
-            dateString
-            duration
-            organizer_email
-            participants
-            transcript_url
-            audio_url
-            video_url
-            speakers {
-                id
-                name
-            }
-            sentences {
-                index
-                speaker_name
-                speaker_id
-                text
-                start_time
-                end_time
-            }
-            summary {
-                keywords
-                action_items
-                outline
-                overview
-                short_summary
-                meeting_type
-                topics_discussed
-            }
-            analytics {
-                sentiments {
-                    negative_pct
-                    neutral_pct
-                    positive_pct
-                }
-                speakers {
-                    speaker_id
-                    name
-                    duration
-                    word_count
-                    longest_monologue
-                    filler_words
-                    questions
-                }
-            }
         }
     }
     """
-    variables = {"transcriptId": transcript_id}
-    return fireflies_request(query, variables)
+    transcript_ids = []
+    while len(transcript_ids) < max_transcripts:
+        limit = min(FIREFLIES_PAGE_SIZE, max_transcripts - len(transcript_ids))
+        result = fireflies_request(query, {"limit": limit, "skip": len(transcript_ids), "mine": mine})
+        if "error" in result:
+            return result
+        page = [transcript["id"] for transcript in result.get("transcripts") or []]
+        transcript_ids.extend(page)
+        if len(page) < limit:
+            break
+    
+    archived = get_archive().archived_ids(transcript_ids)
+    missing = [transcript_id for transcript_id in transcript_ids if transcript_id not in archived]
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=FIREFLIES_SYNC_CONCURRENCY) as executor:
+        for future in as_completed([executor.submit(archive_transcript, transcript_id) for transcript_id in missing]):
+            results.append(future.result())
+    
+    failed = [result for result in results if "error" in result]
+    pending = [result["transcript_id"] for result in results if result.get("pending")]
+    return {
+        "checked": len(transcript_ids),
+        "archived": len(results) - len(failed) - len(pending),
+        "already_archived": len(archived),
+        "not_processed_yet": pending,
+        "failed": failed,
+        "archive": get_archive().stats()
+    }
+
+@mcp.tool()
+async def sync_transcript_archive(max_transcripts: int = 100, mine: bool = False) -> Dict:
+    """
+    Archive recent transcripts locally so their content can be searched
+    
+    Transcripts already in the archive are skipped. Transcripts Fireflies has not
+    processed yet have no sentences; they are left out and archived on a later sync.
+    
+    Args:
+        max_transcripts: Number of most recent transcripts to check (default 100)
+        mine: Only your own transcripts instead of the whole team's (default False)
+        
+    Returns:
+        Counts of archived, already archived and failed transcripts
+    """
+    # Fetching transcripts with every sentence takes a while, keep it off the event loop
+    return await asyncio.to_thread(archive_recent_transcripts, max_transcripts, mine)
+
+@mcp.tool()
+def search_transcript_archive(
+    query: Optional[str] = None,
+    phrase: Optional[str] = None,
+    speaker: Optional[str] = None,
+    transcript_id: Optional[str] = None,
+    limit: int = 20
+) -> Dict:
+    """
+    Full-text search over archived transcript sentences, ranked by BM25
+    
+    Run sync_transcript_archive first to fill the archive.
+    
+    Args:
+        query: Words that must all appear in the sentence (any order, word stems match)
+        phrase: Exact phrase that must appear in the sentence
+        speaker: Only sentences by speakers whose name contains this (optional)
+        transcript_id: Only search this transcript (optional)
+        limit: Number of sentences to return (default 20, max 100)
+        
+    Returns:
+        Matching sentences with transcript, speaker and start/end time in milliseconds
+    """
+    try:
+        hits = get_archive().search(
+            query=query,
+            phrase=phrase,
+            speaker=speaker,
+            transcript_id=transcript_id,
+            limit=max(1, min(limit, 100))
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    
+    return {"total": len(hits), "hits": hits}
+
+# ===== INCREMENTAL SYNC =====
+
+def to_graphql_date(ms: float) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+def sync_transcript_listings(max_age: Optional[float] = None, wait: bool = True) -> Dict:
+    """Pull transcripts newer than the watermark into the listing cache
+    
+    The first sync backfills the most recent FIREFLIES_SYNC_BACKFILL transcripts.
+    Later syncs ask only for transcripts from a day before the newest cached one,
+    paging with skip until a short page. Every FIREFLIES_LISTING_MAX_AGE / 2 the
+    backfill window is listed again, so renames and deletes made outside this
+    server are picked up too.
+    
+    Args:
+        max_age: Skip the sync when the last one finished less than this many seconds ago
+        wait: Wait for a sync already running instead of returning an error
+    """
+    if not SYNC_LOCK.acquire(blocking=wait):
+        return {"error": "A Fireflies sync is already running"}
+    try:
+        archive = get_archive()
+        # Another caller may have synced while this one waited for the lock
+        last_sync_at = archive.get_state("last_sync_at")
+        if max_age is not None and last_sync_at is not None and time.time() - last_sync_at < max_age:
+            return {"fetched": 0, "transcript_ids": [], "watermark": archive.get_state("watermark")}
+        
+        watermark = archive.get_state("watermark")
+        last_full_sync_at = archive.get_state("last_full_sync_at")
+        full = not watermark or last_full_sync_at is None or time.time() - last_full_sync_at > FIREFLIES_LISTING_MAX_AGE / 2
+        query = f"""
+        query SyncTranscripts($limit: Int, $skip: Int, $fromDate: DateTime) {{
+            transcripts(limit: $limit, skip: $skip, fromDate: $fromDate) {graphql_selection(LISTING_FIELDS)}
+        }}
+        """
+        variables = {"limit": FIREFLIES_PAGE_SIZE, "skip": 0}
+        if not full:
+            variables["fromDate"] = to_graphql_date(watermark - FIREFLIES_SYNC_LOOKBACK_MS)
+        
+        started = time.time()
+        fetched, new_ids, reached_end, oldest = 0, [], False, None
+        while not full or fetched < FIREFLIES_SYNC_BACKFILL:
+            result = fireflies_request(query, variables)
+            if "error" in result:
+                return result
+            page = result.get("transcripts") or []
+            archive.save_listings(page)
+            new_ids.extend(transcript["id"] for transcript in page)
+            oldest = min([transcript["date"] for transcript in page if transcript.get("date") is not None] + ([oldest] if oldest is not None else []), default=None)
+            fetched += len(page)
+            if len(page) < variables["limit"]:
+                reached_end = True
+                break
+            variables["skip"] += len(page)
+        
+        if full:
+            # Cached listings in the re-listed range that Fireflies no longer returned were deleted elsewhere
+            archive.prune_listings(listed_before=started, since_date=None if reached_end else oldest)
+            # Every transcript is cached, so a short cache answer is the full answer
+            archive.set_state("backfill_complete", reached_end)
+            archive.set_state("last_full_sync_at", started)
+        
+        dates = [transcript["date"] for transcript in archive.listings(1)]
+        if dates:
+            archive.set_state("watermark", dates[0])
+        archive.set_state("last_sync_at", time.time())
+        
+        return {"fetched": fetched, "transcript_ids": new_ids, "watermark": archive.get_state("watermark")}
+    finally:
+        SYNC_LOCK.release()
+
+def sync_transcripts() -> Dict:
+    """Refresh the listing cache, then archive sentences of the newest transcripts not archived yet
+    
+    Only the newest FIREFLIES_SYNC_ARCHIVE_MAX listed transcripts are archived, one at a
+    time, so a fresh deployment does not fetch its whole backfill at once. Older
+    transcripts are archived on request with sync_transcript_archive.
+    """
+    result = sync_transcript_listings()
+    if "error" in result:
+        return result
+    
+    archive = get_archive()
+    newest = [transcript["id"] for transcript in archive.listings(FIREFLIES_SYNC_ARCHIVE_MAX)]
+    archived = archive.archived_ids(newest)
+    missing = [transcript_id for transcript_id in newest if transcript_id not in archived]
+    results = []
+    for transcript_id in missing:
+        # Space out the sentence queries, and stop early when the hub shuts down
+        if results and SYNC_STOP.wait(FIREFLIES_SYNC_ARCHIVE_DELAY):
+            break
+        results.append(archive_transcript(transcript_id))
+    failed = [r for r in results if "error" in r]
+    pending = [r for r in results if r.get("pending")]
+    
+    return {"fetched": result["fetched"], "archived": len(results) - len(failed) - len(pending), "failed": failed}
+
+async def transcript_sync_loop():
+    while True:
+        try:
+            result = await asyncio.to_thread(sync_transcripts)
+            if "error" in result:
+                logger.warning(f"Fireflies sync failed: {result['error']}")
+            else:
+                logger.info(f"Fireflies sync: {result['fetched']} listed, {result['archived']} archived")
+        except Exception:
+            logger.exception("Fireflies sync crashed")
+        await asyncio.sleep(FIREFLIES_SYNC_INTERVAL)
+
+@contextlib.asynccontextmanager
+async def run_transcript_sync():
+    """Run the background sync for the lifetime of the hub"""
+    global SYNC_TASK
+    if not FIREFLIES_API_KEY:
+        logger.warning("FIREFLIES_API_KEY is not set, background sync disabled")
+        yield
+        return
+    
+    SYNC_STOP.clear()
+    SYNC_TASK = asyncio.create_task(transcript_sync_loop(), name="fireflies-sync")
+    try:
+        yield
+    finally:
+        SYNC_STOP.set()
+        SYNC_TASK.cancel()
+        await asyncio.gather(SYNC_TASK, return_exceptions=True)
+        SYNC_TASK = None
+
+def get_my_email() -> Optional[str]:
+    """Email of the API key owner, looked up once and kept in the cache"""
+    archive = get_archive()
+    email = archive.get_state("my_email")
+    if not email:
+        result = fireflies_request("{ user { email } }")
+        email = (result.get("user") or {}).get("email")
+        if email:
+            archive.set_state("my_email", email)
+    return email
+
+def cached_listings(limit: int, paths: List[str], title: Optional[str] = None, mine: bool = False) -> Optional[List[Dict]]:
+    """Listings served from the cache, or None when only the live API can answer
+    
+    A cache older than FIREFLIES_CACHE_MAX_AGE is synced first, unless a sync is
+    already running, such as the first backfill, in which case the live API answers
+    rather than waiting for it. Fewer cached matches than limit count as a miss unless
+    the cache holds every transcript, and so do fields the sync does not store and
+    entries last listed more than FIREFLIES_LISTING_MAX_AGE ago.
+    """
+    if not set(paths) <= set(LISTING_FIELDS):
+        return None
+    
+    archive = get_archive()
+    last_sync_at = archive.get_state("last_sync_at")
+    if last_sync_at is None or time.time() - last_sync_at > FIREFLIES_CACHE_MAX_AGE:
+        if "error" in sync_transcript_listings(max_age=FIREFLIES_CACHE_MAX_AGE, wait=False):
+            return None
+    
+    owner_email = get_my_email() if mine else None
+    if mine and not owner_email:
+        return None
+    
+    items = archive.listings(limit, title=title, owner_email=owner_email, listed_after=time.time() - FIREFLIES_LISTING_MAX_AGE)
+    if items is None or (len(items) < limit and not archive.get_state("backfill_complete")):
+        return None
+    return items
 
 # ===== SIMPLE MANAGEMENT TOOLS =====
 
@@ -421,7 +1027,11 @@ def update_transcript_title(transcript_id: str, new_title: str) -> Dict:
             "title": new_title
         }
     }
-    return fireflies_request(query, variables)
+    result = fireflies_request(query, variables)
+    if "error" not in result:
+        get_archive().update_title(transcript_id, new_title)
+        get_detail_cache().invalidate(transcript_id)
+    return result
 
 @mcp.tool()
 def delete_transcript_by_id(transcript_id: str) -> Dict:
@@ -446,7 +1056,11 @@ def delete_transcript_by_id(transcript_id: str) -> Dict:
     }
     """
     variables = {"transcriptId": transcript_id}
-    return fireflies_request(query, variables)
+    result = fireflies_request(query, variables)
+    if "error" not in result:
+        get_archive().delete(transcript_id)
+        get_detail_cache().invalidate(transcript_id)
+    return result
 
 @mcp.tool()
 def get_team_analytics_simple() -> Dict:
@@ -0,0 +1,434 @@
+"""
+Local archive of Fireflies transcripts
+
+Transcripts are stored in SQLite with one row per sentence. An FTS5 index over
+the sentence text is the inverted index, and FTS5 ranks matches with BM25, so
+content search runs locally instead of fetching every transcript.
+
+Full transcript payloads are also cached here, zlib-compressed, behind a small
+in-memory LRU (DetailCache).
+"""
+
+import re
+import json
+import zlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def fts_query(query: Optional[str] = None, phrase: Optional[str] = None) -> str:
+    """Build an FTS5 MATCH expression from free text terms and an exact phrase
+
+    Terms are quoted so user input can never be read as FTS5 operators.
+    """
+    parts = [f'"{term}"' for term in re.findall(r"\w+", query or "")]
+    if phrase:
+        words = re.findall(r"\w+", phrase)
+        if words:
+            parts.append('"' + " ".join(words) + '"')
+    return " AND ".join(parts)
+
+
+def to_ms(seconds: Optional[float]) -> Optional[int]:
+    return int(round(seconds * 1000)) if seconds is not None else None
+
+
+class TranscriptArchive:
+    """SQLite archive of transcripts and their sentences, safe to share between threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode, writes are grouped in explicit transactions
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                date REAL,
+                duration REAL,
+                organizer_email TEXT,
+                participants TEXT,
+                speakers TEXT,
+                sentence_count INTEGER NOT NULL,
+                archived_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transcripts_date ON transcripts (date);
+            CREATE TABLE IF NOT EXISTS sentences (
+                id INTEGER PRIMARY KEY,
+                transcript_id TEXT NOT NULL,
+                sentence_index INTEGER,
+                speaker_name TEXT,
+                text TEXT NOT NULL,
+                start_ms INTEGER,
+                end_ms INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_sentences_transcript ON sentences (transcript_id);
+            -- Listing fields of recent transcripts, kept fresh by the incremental sync
+            CREATE TABLE IF NOT EXISTS transcript_listings (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                date REAL,
+                owner_email TEXT,
+                listing TEXT NOT NULL,
+                listed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_listings_date ON transcript_listings (date);
+            -- zlib-compressed JSON of full transcripts, evicted least recently used first
+            CREATE TABLE IF NOT EXISTS transcript_details (
+                id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_details_accessed ON transcript_details (accessed_at);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            -- Index only, the text itself is read from the sentences table
+            CREATE VIRTUAL TABLE IF NOT EXISTS sentence_fts USING fts5(
+                text,
+                content = 'sentences',
+                content_rowid = 'id',
+                tokenize = 'porter unicode61'
+            );
+        """)
+
+    def archived_ids(self, ids: Iterable[str]) -> set:
+        """IDs stored with sentences; an empty transcript is archived again once it has been processed"""
+        ids = list(ids)
+        if not ids:
+            return set()
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT id FROM transcripts WHERE sentence_count > 0 AND id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {row["id"] for row in rows}
+
+    def save(self, transcript: Dict[str, Any]) -> int:
+        """Store or replace a transcript with its sentences, returning the sentence count"""
+        sentences = transcript.get("sentences") or []
+        rows = [
+            (
+                transcript["id"],
+                sentence.get("index"),
+                sentence.get("speaker_name") or "",
+                sentence.get("text") or "",
+                to_ms(sentence.get("start_time")),
+                to_ms(sentence.get("end_time")),
+            )
+            for sentence in sentences
+        ]
+
+        with self._lock:
+            self.db.execute("BEGIN")
+            try:
+                self._delete_sentences(transcript["id"])
+                self.db.executemany(
+                    "INSERT INTO sentences (transcript_id, sentence_index, speaker_name, text, start_ms, end_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.db.execute(
+                    "INSERT INTO sentence_fts (rowid, text) SELECT id, text FROM sentences WHERE transcript_id = ?",
+                    (transcript["id"],),
+                )
+                self.db.execute(
+                    "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        transcript["id"],
+                        transcript.get("title"),
+                        transcript.get("date"),
+                        transcript.get("duration"),
+                        transcript.get("organizer_email"),
+                        json.dumps(transcript.get("participants") or []),
+                        json.dumps([speaker.get("name") for speaker in transcript.get("speakers") or []]),
+                        len(rows),
+                        time.time(),
+                    ),
+                )
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _delete_sentences(self, transcript_id: str) -> None:
+        # An external content index must be told which rows leave, with their old text
+        self.db.execute(
+            "INSERT INTO sentence_fts (sentence_fts, rowid, text) "
+            "SELECT 'delete', id, text FROM sentences WHERE transcript_id = ?",
+            (transcript_id,),
+        )
+        self.db.execute("DELETE FROM sentences WHERE transcript_id = ?", (transcript_id,))
+
+    def delete(self, transcript_id: str) -> None:
+        with self._lock:
+            self.db.execute("BEGIN")
+            try:
+                self._delete_sentences(transcript_id)
+                self.db.execute("DELETE FROM transcripts WHERE id = ?", (transcript_id,))
+                self.db.execute("DELETE FROM transcript_listings WHERE id = ?", (transcript_id,))
+                self.db.execute("DELETE FROM transcript_details WHERE id = ?", (transcript_id,))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def update_title(self, transcript_id: str, title: str) -> None:
+        with self._lock:
+            self.db.execute("UPDATE transcripts SET title = ? WHERE id = ?", (title, transcript_id))
+            self.db.execute(
+                "UPDATE transcript_listings SET title = ?, listing = json_set(listing, '$.title', ?) WHERE id = ?",
+                (title, title, transcript_id),
+            )
+
+    def save_listings(self, transcripts: List[Dict[str, Any]]) -> int:
+        """Store or refresh listing entries, returning how many were not cached before"""
+        ids = [transcript["id"] for transcript in transcripts]
+        now = time.time()
+        with self._lock:
+            known = {
+                row["id"] for row in self.db.execute(
+                    f"SELECT id FROM transcript_listings WHERE id IN ({','.join('?' * len(ids))})", ids
+                )
+            } if ids else set()
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT OR REPLACE INTO transcript_listings VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        transcript["id"],
+                        transcript.get("title"),
+                        transcript.get("date"),
+                        ((transcript.get("user") or {}).get("email") or transcript.get("organizer_email") or "").lower(),
+                        json.dumps(transcript),
+                        now,
+                    )
+                    for transcript in transcripts
+                ],
+            )
+            self.db.execute("COMMIT")
+        return len(set(ids) - known)
+
+    def listings(
+        self,
+        limit: int,
+        title: Optional[str] = None,
+        owner_email: Optional[str] = None,
+        listed_after: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Cached listing entries, newest first
+        
+        Returns None when any of them was last listed before listed_after, since the
+        answer may then include transcripts renamed or deleted since.
+        """
+        sql, params = "SELECT listing, listed_at FROM transcript_listings WHERE 1 = 1", []
+        if title:
+            sql += " AND title LIKE ?"
+            params.append(f"%{title}%")
+        if owner_email:
+            sql += " AND owner_email = ?"
+            params.append(owner_email.lower())
+        sql += " ORDER BY date DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.db.execute(sql, params).fetchall()
+        if listed_after is not None and any(row["listed_at"] < listed_after for row in rows):
+            return None
+        return [json.loads(row["listing"]) for row in rows]
+
+    def prune_listings(self, listed_before: float, since_date: Optional[float] = None) -> int:
+        """Drop listings not refreshed since listed_before, only those dated since_date or later if given"""
+        sql, params = "DELETE FROM transcript_listings WHERE listed_at < ?", [listed_before]
+        if since_date is not None:
+            sql += " AND date >= ?"
+            params.append(since_date)
+        with self._lock:
+            return self.db.execute(sql, params).rowcount
+
+    def get_detail(self, transcript_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.db.execute("SELECT payload FROM transcript_details WHERE id = ?", (transcript_id,)).fetchone()
+            if row:
+                self.db.execute("UPDATE transcript_details SET accessed_at = ? WHERE id = ?", (time.time(), transcript_id))
+        return row["payload"] if row else None
+
+    def put_detail(self, transcript_id: str, payload: bytes, max_bytes: int) -> None:
+        """Store a compressed payload, then drop the least recently used ones above max_bytes"""
+        with self._lock:
+            self.db.execute("BEGIN")
+            try:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO transcript_details VALUES (?, ?, ?, ?)",
+                    (transcript_id, payload, len(payload), time.time()),
+                )
+                total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM transcript_details").fetchone()[0]
+                evict = []
+                for row in self.db.execute("SELECT id, size FROM transcript_details ORDER BY accessed_at"):
+                    if total <= max_bytes:
+                        break
+                    evict.append((row["id"],))
+                    total -= row["size"]
+                self.db.executemany("DELETE FROM transcript_details WHERE id = ?", evict)
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def drop_detail(self, transcript_id: str) -> None:
+        with self._lock:
+            self.db.execute("DELETE FROM transcript_details WHERE id = ?", (transcript_id,))
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self.db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set_state(self, key: str, value: Any) -> None:
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (key, json.dumps(value)))
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        phrase: Optional[str] = None,
+        speaker: Optional[str] = None,
+        transcript_id: Optional[str] = None,
+        from_date: Optional[float] = None,
+        to_date: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """Sentences matching all terms and the phrase, best BM25 score first"""
+        match = fts_query(query, phrase)
+        if not match:
+            raise ValueError("Provide search terms or a phrase")
+
+        sql = """
+            SELECT s.transcript_id, s.sentence_index, s.speaker_name, s.text, s.start_ms, s.end_ms,
+                   bm25(sentence_fts) AS rank, t.title, t.date
+            FROM sentence_fts
+            JOIN sentences AS s ON s.id = sentence_fts.rowid
+            JOIN transcripts AS t ON t.id = s.transcript_id
+            WHERE sentence_fts MATCH ?
+        """
+        params: List[Any] = [match]
+        if speaker:
+            sql += " AND s.speaker_name LIKE ?"
+            params.append(f"%{speaker}%")
+        if transcript_id:
+            sql += " AND s.transcript_id = ?"
+            params.append(transcript_id)
+        if from_date is not None:
+            sql += " AND t.date >= ?"
+            params.append(from_date)
+        if to_date is not None:
+            sql += " AND t.date < ?"
+            params.append(to_date)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.db.execute(sql, params).fetchall()
+
+        return [
+            {
+                "transcript_id": row["transcript_id"],
+                "title": row["title"],
+                "date": row["date"],
+                "sentence_index": row["sentence_index"],
+                "speaker_name": row["speaker_name"],
+                "text": row["text"],
+                "start_ms": row["start_ms"],
+                "end_ms": row["end_ms"],
+                # bm25() is lower for better matches, flip it so higher is better
+                "score": round(-row["rank"], 4),
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT COUNT(*) AS transcripts, COALESCE(SUM(sentence_count), 0) AS sentences, "
+                "MIN(date) AS oldest, MAX(date) AS newest, MAX(archived_at) AS last_archived FROM transcripts"
+            ).fetchone()
+            listed = self.db.execute("SELECT COUNT(*) FROM transcript_listings").fetchone()[0]
+        return {**dict(row), "listed": listed}
+
+
+class DetailCache:
+    """Full transcript payloads keyed by ID, in memory up to memory_bytes and on disk up to disk_bytes
+
+    Payloads are held as zlib-compressed JSON in both tiers, so the byte budgets count
+    compressed sizes. A disk hit is promoted into the in-memory LRU.
+    """
+
+    def __init__(self, archive: TranscriptArchive, memory_bytes: int, disk_bytes: int):
+        self.archive = archive
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def get(self, transcript_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._entries.get(transcript_id)
+            if payload is not None:
+                self._entries.move_to_end(transcript_id)
+                self.hits["memory"] += 1
+        if payload is None:
+            payload = self.archive.get_detail(transcript_id)
+            with self._lock:
+                if payload is None:
+                    self.misses += 1
+                    return None
+                self.hits["disk"] += 1
+                self._remember(transcript_id, payload)
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, transcript_id: str, transcript: Dict[str, Any]) -> int:
+        """Cache a payload in both tiers, returning its compressed size"""
+        payload = zlib.compress(json.dumps(transcript, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._remember(transcript_id, payload)
+        self.archive.put_detail(transcript_id, payload, self.disk_bytes)
+        return len(payload)
+
+    def invalidate(self, transcript_id: str) -> None:
+        with self._lock:
+            self._forget(transcript_id)
+        self.archive.drop_detail(transcript_id)
+
+    def _remember(self, transcript_id: str, payload: bytes) -> None:
+        self._forget(transcript_id)
+        if len(payload) > self.memory_bytes:
+            return
+        while self._size + len(payload) > self.memory_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+        self._entries[transcript_id] = payload
+        self._size += len(payload)
+
+    def _forget(self, transcript_id: str) -> None:
+        payload = self._entries.pop(transcript_id, None)
+        if payload is not None:
+            self._size -= len(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._size,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+            }
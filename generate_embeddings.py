@@ -1,63 +1,412 @@
 import os
-from openai import OpenAI
+import re
+import glob
+import time
+import random
+import asyncio
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import json
+import tiktoken
+from pathlib import Path
 from pinecone import Pinecone
 import sys
 
+from embedding_store import EmbeddingCache, content_hash, diff_manifest, load_manifest, save_manifest, save_embedding_matrix
+
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
+# Initialize OpenAI clients
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Initialize Pinecone client
 pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+DEFAULT_DOC_PATTERNS = ["*.md", "docs/**/*.md"]
+
+# Chunking, in tokens of the embedding model's encoding
+CHUNK_TOKENS = 512
+CHUNK_OVERLAP_TOKENS = 64
+
+# Embedding requests: inputs per request, tokens per request (API limit is 300k) and requests in flight
+EMBED_BATCH_SIZE = 128
+EMBED_BATCH_MAX_TOKENS = 250_000
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+# Vectors of previously embedded chunks, and the chunk list of the last run
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+
+# Pinecone upserts: each request is bounded by Pinecone's vector count and size limits
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "docs")
+PINECONE_BATCH_SIZE = 1000
+PINECONE_MAX_REQUEST_BYTES = 2 * 1024 * 1024
+PINECONE_MAX_CONCURRENCY = int(os.getenv("PINECONE_MAX_CONCURRENCY", "8"))
+PINECONE_RETRIES = 4
+PINECONE_NAMESPACE_STATE = os.getenv("PINECONE_NAMESPACE_STATE", "pinecone_namespace.json")  # Which namespace queries should use
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding():
+    """Tokenizer of the embedding model, loaded on first use since tiktoken may download it"""
+    return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+
+
 def generate_embedding(text):
     """Generate embedding for a given text using OpenAI's text-embedding-3-large"""
     response = client.embeddings.create(
-        model="text-embedding-3-large",
+        model=EMBEDDING_MODEL,
         input=text
     )
     return response.data[0].embedding
 
-def prepare_readme_for_pinecone():
-    """Read readme.md and prepare it for Pinecone with embeddings"""
-    # Read the readme file
-    with open("readme.md", "r") as f:
-        content = f.read()
-    
-    # Generate embedding
-    print("Generating embedding for readme.md...")
-    embedding = generate_embedding(content)
-    
-    # Prepare the record for Pinecone
-    record = {
-        "id": "readme-md",
-        "values": embedding,
-        "metadata": {
-            "text": content[:1000],  # Store first 1000 chars as metadata (Pinecone limit)
-            "filename": "readme.md",
-            "doc_type": "documentation",
-            "full_text_length": len(content)
-        }
+
+def find_documents(root=".", patterns=None):
+    """List markdown files under root matching the glob patterns, without duplicates"""
+    paths = set()
+    for pattern in patterns or DEFAULT_DOC_PATTERNS:
+        paths.update(glob.glob(os.path.join(root, pattern), recursive=True))
+    return sorted(os.path.relpath(path, root) for path in paths if os.path.isfile(path))
+
+
+def split_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Split text into chunks of at most max_tokens, overlapping by about overlap_tokens
+
+    Chunks are packed from whole paragraphs so they break at natural boundaries.
+    A paragraph longer than max_tokens is cut into token windows.
+    """
+    encoding = get_encoding()
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        tokens = encoding.encode(paragraph)
+        if not tokens:
+            continue
+        if len(tokens) <= max_tokens:
+            pieces.append((paragraph, len(tokens)))
+            continue
+        step = max_tokens - overlap_tokens
+        for start in range(0, len(tokens), step):
+            window = tokens[start:start + max_tokens]
+            pieces.append((encoding.decode(window), len(window)))
+            if start + max_tokens >= len(tokens):
+                break
+
+    chunks = []
+    current, current_tokens = [], 0
+    for piece, piece_tokens in pieces:
+        # +1 approximates the paragraph separator
+        if current and current_tokens + piece_tokens + 1 > max_tokens:
+            chunks.append("\n\n".join(text for text, _ in current))
+            # Carry trailing paragraphs into the next chunk as overlap
+            budget = min(overlap_tokens, max_tokens - piece_tokens - 1)
+            overlap, overlap_size = [], 0
+            for previous, previous_tokens in reversed(current):
+                if overlap_size + previous_tokens + 1 > budget:
+                    break
+                overlap.insert(0, (previous, previous_tokens))
+                overlap_size += previous_tokens + 1
+            if not overlap and budget > 1:
+                # The last paragraph is too long to repeat whole, repeat its tail instead
+                tail = encoding.encode(current[-1][0])[-(budget - 1):]
+                overlap, overlap_size = [(encoding.decode(tail), len(tail))], len(tail) + 1
+            current, current_tokens = overlap, overlap_size
+        current.append((piece, piece_tokens))
+        current_tokens += piece_tokens + 1
+    if current:
+        chunks.append("\n\n".join(text for text, _ in current))
+    return chunks
+
+
+def record_id(path, index):
+    """Stable Pinecone ID for a chunk, e.g. docs/mailgun.md chunk 3 -> docs-mailgun-md-3"""
+    return re.sub(r"[^a-z0-9]+", "-", path.lower()).strip("-") + f"-{index}"
+
+
+def chunk_documents(paths, root="."):
+    """Read documents and split them into chunk dicts with text and metadata"""
+    chunks = []
+    for path in paths:
+        with open(os.path.join(root, path), "r", encoding="utf-8") as f:
+            content = f.read()
+        pieces = split_text(content)
+        for index, text in enumerate(pieces):
+            chunks.append({
+                "id": record_id(path, index),
+                "text": text,
+                "hash": content_hash(text),
+                "tokens": len(get_encoding().encode(text)),
+                "filename": path,
+                "chunk_index": index,
+                "chunk_count": len(pieces)
+            })
+    return chunks
+
+
+def make_batches(chunks):
+    """Group chunks into embedding requests bounded by input count and total tokens"""
+    batches, batch, batch_tokens = [], [], 0
+    for chunk in chunks:
+        if batch and (len(batch) >= EMBED_BATCH_SIZE or batch_tokens + chunk["tokens"] > EMBED_BATCH_MAX_TOKENS):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(chunk)
+        batch_tokens += chunk["tokens"]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def embed_chunks(chunks, max_concurrency=EMBED_MAX_CONCURRENCY):
+    """Embed chunks with one request per batch, at most max_concurrency requests at a time
+
+    Returns one vector per chunk, in the same order as chunks.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def embed_batch(batch):
+        async with semaphore:
+            response = await async_client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=[chunk["text"] for chunk in batch]
+            )
+        # The API returns items with an index, order them to match the inputs
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    results = await asyncio.gather(*(embed_batch(batch) for batch in make_batches(chunks)))
+    return [vector for batch_vectors in results for vector in batch_vectors]
+
+
+def chunk_metadata(chunk):
+    return {
+        "text": chunk["text"],
+        "filename": chunk["filename"],
+        "doc_type": "documentation",
+        "chunk_index": chunk["chunk_index"],
+        "chunk_count": chunk["chunk_count"]
+    }
+
+
+def build_records(chunks, vectors):
+    """Pair chunks with their vectors as Pinecone upsert records"""
+    return [
+        {"id": chunk["id"], "values": vector.tolist(), "metadata": chunk_metadata(chunk)}
+        for chunk, vector in zip(chunks, vectors)
+    ]
+
+
+def make_upsert_batches(records, max_count=PINECONE_BATCH_SIZE, max_bytes=PINECONE_MAX_REQUEST_BYTES):
+    """Group records into upsert requests under the vector count and request size limits
+
+    Sizes are measured as JSON, which is how the request is sent.
+    """
+    # Leave room for the request envelope around the vectors
+    max_bytes = int(max_bytes * 0.95)
+    batches, batch, batch_bytes = [], [], 0
+    for record in records:
+        record_bytes = len(json.dumps(record)) + 1
+        if record_bytes > max_bytes:
+            raise ValueError(f"Record {record['id']} is {record_bytes} bytes, over the {max_bytes} byte request limit")
+        if batch and (len(batch) >= max_count or batch_bytes + record_bytes > max_bytes):
+            batches.append((batch, batch_bytes))
+            batch, batch_bytes = [], 0
+        batch.append(record)
+        batch_bytes += record_bytes
+    if batch:
+        batches.append((batch, batch_bytes))
+    return batches
+
+
+def upsert_batch(index, batch, batch_bytes, namespace, number):
+    """Upsert one batch, retrying with backoff on rate limits, server errors and network errors"""
+    started = time.time()
+    for attempt in range(1, PINECONE_RETRIES + 1):
+        try:
+            index.upsert(vectors=batch, namespace=namespace)
+            break
+        except Exception as e:
+            status = getattr(e, "status", None)
+            # Other client errors will fail the same way again
+            if attempt == PINECONE_RETRIES or (status and 400 <= status < 500 and status != 429):
+                raise
+            delay = min(2 ** attempt, 30) * random.uniform(0.5, 1.0)
+            print(f"Batch {number} attempt {attempt} failed, retrying in {delay:.1f}s: {e}")
+            time.sleep(delay)
+
+    seconds = time.time() - started
+    return {
+        "batch": number,
+        "vectors": len(batch),
+        "bytes": batch_bytes,
+        "attempts": attempt,
+        "seconds": round(seconds, 3),
+        "vectors_per_sec": round(len(batch) / seconds, 1) if seconds else None
     }
-    
-    # Save to a JSON file for reference
-    with open("readme_embedding.json", "w") as f:
+
+
+def upsert_records(index, records, namespace, max_concurrency=PINECONE_MAX_CONCURRENCY):
+    """Upsert all records into a namespace, sending batches concurrently from a thread pool"""
+    batches = make_upsert_batches(records)
+    print(f"Upserting {len(records)} vectors to namespace '{namespace}' in {len(batches)} batches...")
+
+    started = time.time()
+    results, failures = [], []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {
+            executor.submit(upsert_batch, index, batch, batch_bytes, namespace, number): number
+            for number, (batch, batch_bytes) in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append({"batch": futures[future], "error": str(e)})
+                print(f"Batch {futures[future]} failed: {e}")
+                continue
+            results.append(result)
+            print(f"Batch {result['batch']}: {result['vectors']} vectors, {result['bytes'] / 1024:.0f} KB "
+                  f"in {result['seconds']}s ({result['vectors_per_sec']} vectors/s, {result['attempts']} attempts)")
+
+    seconds = time.time() - started
+    upserted = sum(result["vectors"] for result in results)
+    print(f"Upserted {upserted} vectors in {seconds:.1f}s ({upserted / seconds if seconds else 0:.0f} vectors/s)")
+    return {"upserted": upserted, "seconds": round(seconds, 3), "batches": sorted(results, key=lambda r: r["batch"]), "failures": failures}
+
+
+def reindex_pinecone(records, index=None, state_path=PINECONE_NAMESPACE_STATE, keep_previous=False):
+    """Upsert records into a fresh namespace, then make it the active one
+
+    Queries should read the active namespace from state_path. It only changes once
+    every batch has been upserted, so readers never see a half-built index. The
+    previous namespace is deleted afterwards unless keep_previous is set.
+    Pass index to use something other than the PINECONE_INDEX_NAME index.
+    """
+    index = index or pc.Index(PINECONE_INDEX_NAME)
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+
+    previous = state.get("active_namespace")
+    namespace = f"docs-{time.strftime('%Y%m%d-%H%M%S')}"
+    if namespace == previous:
+        namespace += "-1"
+
+    stats = upsert_records(index, records, namespace)
+    if stats["failures"]:
+        print(f"{len(stats['failures'])} batches failed, keeping namespace '{previous}' active")
+        # The namespace may not exist if nothing was upserted; report the batch failures, not this
+        try:
+            index.delete(delete_all=True, namespace=namespace)
+        except Exception as e:
+            print(f"Could not delete partial namespace '{namespace}': {e}")
+            stats["cleanup_error"] = str(e)
+        return stats
+
+    with open(state_path + ".tmp", "w") as f:
         json.dump({
-            "record": record,
-            "embedding_dimension": len(embedding),
-            "model_used": "text-embedding-3-large"
+            "index": PINECONE_INDEX_NAME,
+            "active_namespace": namespace,
+            "previous_namespace": previous,
+            "vector_count": stats["upserted"],
+            "updated_at": time.time()
         }, f, indent=2)
-    
-    print(f"Embedding generated successfully!")
-    print(f"Dimension: {len(embedding)}")
-    print(f"Record saved to readme_embedding.json")
-    
-    return record
+    os.replace(state_path + ".tmp", state_path)
+    print(f"Active namespace is now '{namespace}'")
+
+    if previous and previous != namespace and not keep_previous:
+        # The swap has already happened, a namespace left behind only costs storage
+        try:
+            index.delete(delete_all=True, namespace=previous)
+            print(f"Deleted previous namespace '{previous}'")
+        except Exception as e:
+            print(f"Could not delete previous namespace '{previous}': {e}")
+
+    return {**stats, "namespace": namespace, "previous_namespace": previous}
+
+
+async def prepare_docs_for_pinecone(root=".", patterns=None, output="docs_embeddings", output_format="npy"):
+    """Chunk and embed every matching document and save the records for Pinecone
+
+    The default npy format writes <output>.npy (float32 matrix) and <output>.jsonl
+    (ID and metadata per row), loadable with embedding_store.load_embedding_matrix.
+    The json format writes {"records": [...], "embedding_dimension", "model_used"} to
+    <output>.json, each record shaped like a Pinecone upsert record.
+
+    Returns the records and the IDs of chunks that existed in the previous run but
+    not in this one, so their Pinecone records can be deleted.
+    """
+    paths = find_documents(root, patterns)
+    if not paths:
+        print("No documents found")
+        return [], []
+
+    chunks = chunk_documents(paths, root)
+    print(f"Split {len(paths)} documents into {len(chunks)} chunks")
+
+    # Only text not embedded before with this model goes to the API
+    cache = EmbeddingCache(EMBEDDING_CACHE_DIR, EMBEDDING_MODEL)
+    missing = list({chunk["hash"]: chunk for chunk in chunks if chunk["hash"] not in cache}.values())
+    if missing:
+        print(f"Generating embeddings for {len(missing)} new chunks in {len(make_batches(missing))} requests...")
+        cache.add([chunk["hash"] for chunk in missing], await embed_chunks(missing))
+    print(f"Reused {len(chunks) - len(missing)} cached embeddings")
+
+    vectors = cache.get_many([chunk["hash"] for chunk in chunks])
+    records = build_records(chunks, vectors)
+
+    manifest_path = Path(EMBEDDING_CACHE_DIR) / f"{EMBEDDING_MODEL}.manifest.json"
+    current = {chunk["id"]: chunk["hash"] for chunk in chunks}
+    changes = diff_manifest(load_manifest(manifest_path), current)
+    save_manifest(manifest_path, EMBEDDING_MODEL, current)
+    dropped = cache.compact(current.values())
+    if dropped:
+        print(f"Compacted cache, dropped {dropped} unused vectors")
+
+    print(f"Chunks: {len(changes['new'])} new, {len(changes['changed'])} changed, {len(changes['unchanged'])} unchanged")
+    if changes["deleted"]:
+        print(f"{len(changes['deleted'])} chunks were removed since the last run, delete these IDs from Pinecone:")
+        for chunk_id in changes["deleted"]:
+            print(f"  {chunk_id}")
+
+    output = os.path.splitext(output)[0]
+    if output_format == "json":
+        # Every record with its vector in one JSON document, e.g. for inspection or other vector stores
+        saved = [output + ".json"]
+        with open(saved[0], "w") as f:
+            json.dump({
+                "records": records,
+                "embedding_dimension": vectors.shape[1],
+                "model_used": EMBEDDING_MODEL
+            }, f)
+    else:
+        saved = save_embedding_matrix(output, vectors, [{"id": chunk["id"], **chunk_metadata(chunk)} for chunk in chunks])
+
+    print(f"Embeddings generated successfully!")
+    print(f"Dimension: {vectors.shape[1]}")
+    print(f"{len(records)} records saved to {', '.join(str(path) for path in saved)}")
+
+    return records, changes["deleted"]
+
 
 if __name__ == "__main__":
-    record = prepare_readme_for_pinecone()
-    print("\nYou can now use this record with Pinecone's upsert-records tool")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chunk and embed project docs for Pinecone")
+    parser.add_argument("--root", default=".", help="Directory to search for documents")
+    parser.add_argument("--pattern", action="append", dest="patterns", help=f"Glob pattern, repeatable (default: {' '.join(DEFAULT_DOC_PATTERNS)})")
+    parser.add_argument("--output", default="docs_embeddings", help="Output path without extension")
+    parser.add_argument("--format", choices=["npy", "json"], default="npy", help="npy: float32 matrix plus JSONL metadata, json: records as JSON")
+    parser.add_argument("--upsert", action="store_true", help=f"Upsert into a fresh namespace of the {PINECONE_INDEX_NAME} index and make it active")
+    parser.add_argument("--keep-previous", action="store_true", help="Keep the previously active namespace after --upsert")
+    args = parser.parse_args()
+
+    records, deleted_ids = asyncio.run(prepare_docs_for_pinecone(args.root, args.patterns, args.output, args.format))
+    if args.upsert and records:
+        stats = reindex_pinecone(records, keep_previous=args.keep_previous)
+        if stats["failures"]:
+            sys.exit(f"Upsert failed: {stats['failures'][0]['error']}")
+    else:
+        print("\nRun with --upsert to load these records into Pinecone")
@@ -0,0 +1,255 @@
+"""
+Columnar store for Mailgun events
+
+Events are kept per account as compressed NumPy segments. String columns are
+dictionary encoded (int32 codes plus a sorted category array) so aggregations
+run as vectorized integer operations instead of loops over raw events.
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Dictionary-encoded string columns and how they are read from a Mailgun event
+CATEGORICAL_COLUMNS = {
+    "event": lambda item: item.get("event") or "",
+    "domain": lambda item: ((item.get("envelope") or {}).get("sender") or "").rpartition("@")[2],
+    "recipient_domain": lambda item: item.get("recipient-domain") or (item.get("recipient") or "").rpartition("@")[2],
+    "tag": lambda item: (item.get("tags") or [""])[0] or "",
+    "severity": lambda item: item.get("severity") or "",
+}
+
+# Dimensions derived from the timestamp column
+TIME_DIMENSIONS = ("hour", "day", "hour_of_day")
+
+DIMENSIONS = tuple(CATEGORICAL_COLUMNS) + TIME_DIMENSIONS
+
+# Segments with fewer events than this are merged by compact()
+SMALL_SEGMENT_EVENTS = 10000
+
+
+class EventStore:
+    """Event segments for one account, loaded lazily and cached until new segments appear"""
+
+    def __init__(self, root: str, account: str):
+        self.path = Path(root) / account
+        self._lock = threading.Lock()
+        self._segments: Tuple[str, ...] = ()
+        self.ids = np.empty(0, dtype="U1")
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self.codes: Dict[str, np.ndarray] = {name: np.empty(0, dtype=np.int32) for name in CATEGORICAL_COLUMNS}
+        self.categories: Dict[str, np.ndarray] = {name: np.empty(0, dtype="U1") for name in CATEGORICAL_COLUMNS}
+        self._appended_ids: set = set()  # Written by append() since the last load()
+
+    def segment_files(self) -> Tuple[str, ...]:
+        if not self.path.exists():
+            return ()
+        return tuple(sorted(str(p) for p in self.path.glob("segment-*.npz")))
+
+    def append(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Write events not stored yet as a new segment and return how many were stored
+
+        Resuming an ingest from the last stored timestamp fetches the boundary events
+        again, so events whose id is already in the store are dropped, and nothing is
+        written when none are left.
+        """
+        items = [item for item in items if item.get("id") and item.get("timestamp") is not None]
+        if items:
+            ids = np.array([item["id"] for item in items])
+            _, first = np.unique(ids, return_index=True)
+            keep = np.zeros(len(items), dtype=bool)
+            keep[first] = True
+            keep &= ~np.isin(ids, self.ids)
+            if self._appended_ids:
+                keep &= ~np.isin(ids, np.array(list(self._appended_ids)))
+            items = [item for item, kept in zip(items, keep) if kept]
+        if not items:
+            return 0
+
+        self._write_segment(self._encode(items))
+        self._appended_ids.update(item["id"] for item in items)
+        return len(items)
+
+    def _encode(self, items: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        arrays = {
+            "id": np.array([item["id"] for item in items]),
+            "timestamp": np.array([item["timestamp"] for item in items], dtype=np.float64),
+        }
+        for name, extract in CATEGORICAL_COLUMNS.items():
+            categories, codes = np.unique(np.array([extract(item) for item in items]), return_inverse=True)
+            arrays[f"{name}__categories"] = categories
+            arrays[f"{name}__codes"] = codes.astype(np.int32)
+        return arrays
+
+    def _write_segment(self, arrays: Dict[str, np.ndarray]) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        segment = self.path / f"segment-{time.time_ns()}.npz"
+        # Write then rename so readers never see a partial segment
+        tmp_segment = segment.with_name("tmp-" + segment.name)
+        np.savez_compressed(tmp_segment, **arrays)
+        os.replace(tmp_segment, segment)
+        return segment
+
+    @staticmethod
+    def _merge(loaded: List[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Concatenate segment arrays into ids, timestamps, codes and categories, one copy per id"""
+        ids = np.concatenate([data["id"] for data in loaded])
+        timestamps = np.concatenate([data["timestamp"] for data in loaded])
+
+        codes, categories = {}, {}
+        for name in CATEGORICAL_COLUMNS:
+            # Remap each segment's local codes onto one sorted category array
+            merged = np.unique(np.concatenate([data[f"{name}__categories"] for data in loaded]))
+            codes[name] = np.concatenate([
+                np.searchsorted(merged, data[f"{name}__categories"]).astype(np.int32)[data[f"{name}__codes"]]
+                for data in loaded
+            ])
+            categories[name] = merged
+
+        # Segments written before duplicates were filtered, or by an interrupted
+        # compaction, can hold the same event twice, keep the first copy
+        _, first = np.unique(ids, return_index=True)
+        first.sort()
+        return ids[first], timestamps[first], {name: column[first] for name, column in codes.items()}, categories
+
+    def compact(self, min_events: int = SMALL_SEGMENT_EVENTS) -> int:
+        """Merge segments holding fewer than min_events events into one, returning how many were merged
+
+        The merged segment is written before the small ones are removed, so a crash
+        in between leaves duplicates that load() drops rather than lost events.
+        """
+        with self._lock:
+            small = []
+            for segment in self.segment_files():
+                with np.load(segment) as data:
+                    if len(data["id"]) < min_events:
+                        small.append(segment)
+            if len(small) < 2:
+                return 0
+
+            loaded = []
+            for segment in small:
+                with np.load(segment) as data:
+                    loaded.append(dict(data))
+            ids, timestamps, codes, categories = self._merge(loaded)
+
+            arrays = {"id": ids, "timestamp": timestamps}
+            for name in CATEGORICAL_COLUMNS:
+                arrays[f"{name}__categories"] = categories[name]
+                arrays[f"{name}__codes"] = codes[name]
+            self._write_segment(arrays)
+            for segment in small:
+                os.remove(segment)
+            logger.info(f"Compacted {len(small)} segments ({len(ids)} events) in {self.path}")
+            return len(small)
+
+    def load(self) -> "EventStore":
+        """Concatenate all segments into global columns, skipping the work when nothing changed"""
+        with self._lock:
+            segments = self.segment_files()
+            if segments == self._segments:
+                return self
+
+            loaded = []
+            for segment in segments:
+                with np.load(segment) as data:
+                    loaded.append(dict(data))
+
+            if not loaded:
+                self.ids = np.empty(0, dtype="U1")
+                self.timestamps = np.empty(0, dtype=np.float64)
+                self.codes = {name: np.empty(0, dtype=np.int32) for name in CATEGORICAL_COLUMNS}
+                self.categories = {name: np.empty(0, dtype="U1") for name in CATEGORICAL_COLUMNS}
+                self._segments = segments
+                self._appended_ids = set()
+                return self
+
+            self.ids, self.timestamps, self.codes, self.categories = self._merge(loaded)
+            self._segments = segments
+            self._appended_ids = set()
+            logger.info(f"Loaded {len(self.ids)} events from {len(segments)} segments in {self.path}")
+            return self
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps.max()) if self.size else None
+
+    def _dimension(self, name: str, mask: np.ndarray) -> Tuple[np.ndarray, List[Any]]:
+        """Integer codes for the selected rows plus the label of each code"""
+        if name in CATEGORICAL_COLUMNS:
+            return self.codes[name][mask], self.categories[name].tolist()
+
+        hours = (self.timestamps[mask] // 3600).astype(np.int64)
+        if name == "hour_of_day":
+            return (hours % 24).astype(np.int32), list(range(24))
+
+        buckets = hours if name == "hour" else hours // 24
+        step = 3600 if name == "hour" else 86400
+        values, inverse = np.unique(buckets, return_inverse=True)
+        fmt = "%Y-%m-%dT%H:00:00Z" if name == "hour" else "%Y-%m-%d"
+        labels = [datetime.fromtimestamp(int(value) * step, tz=timezone.utc).strftime(fmt) for value in values]
+        return inverse.astype(np.int32), labels
+
+    def aggregate(
+        self,
+        group_by: List[str],
+        filters: Optional[Dict[str, str]] = None,
+        begin: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Count events grouped by any combination of dimensions"""
+        with self._lock:
+            return self._aggregate(group_by, filters, begin, end, limit)
+
+    def _aggregate(self, group_by, filters, begin, end, limit) -> Dict[str, Any]:
+        unknown = [name for name in group_by if name not in DIMENSIONS]
+        unknown += [name for name in (filters or {}) if name not in CATEGORICAL_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {unknown}. Available: {list(DIMENSIONS)}")
+
+        mask = np.ones(self.size, dtype=bool)
+        if begin is not None:
+            mask &= self.timestamps >= begin
+        if end is not None:
+            mask &= self.timestamps < end
+        for name, value in (filters or {}).items():
+            position = np.searchsorted(self.categories[name], value)
+            if position >= len(self.categories[name]) or self.categories[name][position] != value:
+                mask[:] = False
+            else:
+                mask &= self.codes[name] == position
+
+        matched = int(mask.sum())
+        if not group_by or not matched:
+            return {"matched": matched, "groups": []}
+
+        dimension_codes, dimension_labels = zip(*(self._dimension(name, mask) for name in group_by))
+        shape = tuple(max(len(labels), 1) for labels in dimension_labels)
+        # One integer key per row, then a single unique/count pass
+        keys = np.ravel_multi_index(dimension_codes, shape)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+
+        order = np.argsort(-counts, kind="stable")
+        if limit:
+            order = order[:limit]
+
+        key_codes = np.unravel_index(unique_keys[order], shape)
+        groups = []
+        for row, count in enumerate(counts[order]):
+            group = {name: dimension_labels[i][key_codes[i][row]] for i, name in enumerate(group_by)}
+            group["count"] = int(count)
+            groups.append(group)
+
+        return {"matched": matched, "groups": groups, "total_groups": len(unique_keys)}
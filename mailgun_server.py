@@ -5,12 +5,22 @@ Mailgun MCP Server with Multi-Account Support for FastAPI deployment
 
 import os
 import json
-import base64
+import mimetypes
+import time
+import random
+import sqlite3
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import contextlib
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, Optional, List, Tuple, Union
 import httpx
 from dotenv import load_dotenv
 
+from mailgun_event_store import EventStore
+
 from mcp import ClientSession, server
 from mcp.server.fastmcp import FastMCP
 from mcp.types import TextContent, Tool
@@ -29,6 +39,53 @@ mcp = FastMCP("mailgun-multi-account", stateless_http=True)
 ACCOUNTS: Dict[str, Dict[str, str]] = {}
 CURRENT_ACCOUNT: Optional[str] = None
 
+# Batch sending limits
+MAILGUN_BATCH_SIZE = 1000  # Mailgun's maximum recipients per message
+MAILGUN_BULK_MAX_WAIT = float(os.getenv('MAILGUN_BULK_MAX_WAIT', '60'))  # Seconds a bulk send waits for the rate limit before queueing the rest
+MAILGUN_MAX_CONCURRENCY = int(os.getenv('MAILGUN_MAX_CONCURRENCY', '4'))  # Concurrent requests per account
+ACCOUNT_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+
+# Long-lived HTTP clients, one per account: {account_name: (api_key, client)}
+MAILGUN_API_BASE = os.getenv('MAILGUN_API_BASE', "https://api.mailgun.net/v3")
+MAILGUN_CLIENTS: Dict[str, Tuple[str, httpx.AsyncClient]] = {}
+STALE_CLIENTS: List[httpx.AsyncClient] = []  # Clients of removed accounts, closed on next use
+MAILGUN_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+MAILGUN_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# Durable outbound queue drained by background workers
+MAILGUN_QUEUE_PATH = os.getenv('MAILGUN_QUEUE_PATH', 'mailgun_queue.db')
+MAILGUN_QUEUE_WORKERS = int(os.getenv('MAILGUN_QUEUE_WORKERS', '2'))
+MAILGUN_QUEUE_MAX_ATTEMPTS = 8
+MAILGUN_QUEUE_BACKOFF_BASE = 2  # Seconds, doubled per attempt
+MAILGUN_QUEUE_BACKOFF_MAX = 900
+MAILGUN_QUEUE_POLL_INTERVAL = 5  # Seconds an idle worker sleeps between checks for due retries
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+QUEUE_DB: Optional[sqlite3.Connection] = None
+QUEUE_WAKEUP: Optional[asyncio.Event] = None
+QUEUE_WORKER_TASKS: List[asyncio.Task] = []
+
+# Event export
+MAILGUN_EXPORT_DIR = os.getenv('MAILGUN_EXPORT_DIR', 'exports')  # export_events only writes inside this directory
+MAILGUN_EVENTS_PAGE_SIZE = 300  # Mailgun's maximum page size
+MAILGUN_EVENTS_RETENTION = 30 * 24 * 3600  # Default look-back when no begin time is given
+
+# Local columnar event store
+MAILGUN_EVENT_STORE_DIR = os.getenv('MAILGUN_EVENT_STORE_DIR', 'event_store')
+MAILGUN_INGEST_SEGMENT_SIZE = 50000  # Events buffered before a segment is written
+EVENT_STORES: Dict[str, EventStore] = {}
+
+# Attachments streamed from local files
+MAILGUN_ATTACHMENT_ROOT = os.getenv('MAILGUN_ATTACHMENT_ROOT', 'attachments')  # send_email only attaches files inside this directory
+MAILGUN_ATTACHMENT_MAX_BYTES = int(os.getenv('MAILGUN_ATTACHMENT_MAX_BYTES', str(25 * 1024 * 1024)))  # Mailgun's message size limit
+MAILGUN_ATTACHMENT_MAX_OPEN_FILES = int(os.getenv('MAILGUN_ATTACHMENT_MAX_OPEN_FILES', '32'))  # Across all sends in flight
+ATTACHMENT_SLOTS: Optional[asyncio.Condition] = None
+OPEN_ATTACHMENTS = 0
+
+# Send rate limits keyed by account name, domain or "default", e.g.
+# {"projectwe": {"per_hour": 5000, "warmup": {"start": "2024-06-01", "per_hour": [100, 300, 1000]}}}
+MAILGUN_RATE_LIMITS: Dict[str, Dict[str, Any]] = {}
+SEND_LIMITERS: Dict[Tuple[str, str], "SendRateLimiter"] = {}
+
 
 def load_accounts():
     """Load Mailgun accounts from environment variables"""
@@ -60,46 +117,136 @@ def load_accounts():
             }
             logger.info(f"Loaded account '{name}' from environment variables")
     
+    # Retire clients of accounts that no longer exist, changed keys are picked up in get_mailgun_client
+    for account_name in list(MAILGUN_CLIENTS):
+        if account_name not in ACCOUNTS:
+            STALE_CLIENTS.append(MAILGUN_CLIENTS.pop(account_name)[1])
+    
     # Set first account as current if available
     if ACCOUNTS and not CURRENT_ACCOUNT:
         CURRENT_ACCOUNT = next(iter(ACCOUNTS))
         logger.info(f"Set current account to: {CURRENT_ACCOUNT}")
 
 
+def load_rate_limits():
+    """Load send rate limits from MAILGUN_RATE_LIMITS, sending without limits when it is invalid"""
+    global MAILGUN_RATE_LIMITS
+    
+    limits_json = os.getenv('MAILGUN_RATE_LIMITS')
+    if not limits_json:
+        return
+    try:
+        limits = json.loads(limits_json)
+    except json.JSONDecodeError:
+        logger.error("Failed to parse MAILGUN_RATE_LIMITS JSON, sending without rate limits")
+        return
+    if not isinstance(limits, dict):
+        logger.error("MAILGUN_RATE_LIMITS must be a JSON object keyed by account, domain or \"default\", sending without rate limits")
+        return
+    
+    MAILGUN_RATE_LIMITS = limits
+    logger.info(f"Loaded send rate limits for {', '.join(limits)}")
+
+
 # Load accounts on startup
 load_accounts()
+load_rate_limits()
 
 
-async def make_mailgun_request(method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
-    """Make a request to Mailgun API"""
-    if not CURRENT_ACCOUNT:
-        raise ValueError("No account selected")
-    
-    account = ACCOUNTS.get(CURRENT_ACCOUNT)
+async def get_mailgun_client(account_name: str) -> httpx.AsyncClient:
+    """Get the account's HTTP client, creating it lazily and rebuilding it when the API key changes"""
+    account = ACCOUNTS.get(account_name)
     if not account:
-        raise ValueError(f"Account '{CURRENT_ACCOUNT}' not found")
+        raise ValueError(f"Account '{account_name}' not found")
     
     api_key = account['api_key']
-    base_url = "https://api.mailgun.net/v3"
+    cached = MAILGUN_CLIENTS.get(account_name)
+    if cached and cached[0] == api_key and not cached[1].is_closed:
+        return cached[1]
     
-    # Create auth header
-    auth_string = base64.b64encode(f"api:{api_key}".encode()).decode()
-    headers = {
-        "Authorization": f"Basic {auth_string}"
-    }
+    # Swap in the new client before awaiting so concurrent callers never build two
+    client = httpx.AsyncClient(
+        base_url=MAILGUN_API_BASE,
+        auth=("api", api_key),
+        http2=True,
+        limits=MAILGUN_POOL_LIMITS,
+        timeout=MAILGUN_TIMEOUT
+    )
+    MAILGUN_CLIENTS[account_name] = (api_key, client)
     
-    url = f"{base_url}{endpoint}"
+    stale = STALE_CLIENTS[:]
+    STALE_CLIENTS.clear()
+    if cached:
+        stale.append(cached[1])
+    for old_client in stale:
+        await old_client.aclose()
     
-    async with httpx.AsyncClient() as client:
-        if method == "GET":
-            response = await client.get(url, headers=headers, params=params)
-        elif method == "POST":
-            response = await client.post(url, headers=headers, data=data)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
-        
-        response.raise_for_status()
-        return response.json()
+    return client
+
+
+async def close_mailgun_clients():
+    """Close every account client (called from the hub lifespan)"""
+    clients = [client for _, client in MAILGUN_CLIENTS.values()] + STALE_CLIENTS
+    MAILGUN_CLIENTS.clear()
+    STALE_CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
+
+
+async def make_mailgun_request(method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None, account_name: Optional[str] = None, files: Optional[List] = None) -> Dict:
+    """Make a request to Mailgun API (defaults to the current account)"""
+    account_name = account_name or CURRENT_ACCOUNT
+    if not account_name:
+        raise ValueError("No account selected")
+    
+    client = await get_mailgun_client(account_name)
+    
+    if method == "GET":
+        response = await client.get(endpoint, params=params)
+    elif method == "POST":
+        # With files the body is sent as multipart, streamed from the open file objects
+        response = await client.post(endpoint, data=data, files=files)
+    else:
+        raise ValueError(f"Unsupported method: {method}")
+    
+    response.raise_for_status()
+    return response.json()
+
+
+def get_account_semaphore(account_name: str) -> asyncio.Semaphore:
+    """Get the semaphore that caps concurrent requests for an account"""
+    if account_name not in ACCOUNT_SEMAPHORES:
+        ACCOUNT_SEMAPHORES[account_name] = asyncio.Semaphore(MAILGUN_MAX_CONCURRENCY)
+    return ACCOUNT_SEMAPHORES[account_name]
+
+
+def resolve_account(account: Optional[str] = None) -> str:
+    """Account for a single tool call: the explicit argument, otherwise the default account
+    
+    Tools resolve the account once and pass it down, so concurrent calls for different
+    accounts never depend on CURRENT_ACCOUNT changing underneath them.
+    """
+    account_name = account or CURRENT_ACCOUNT
+    if not account_name:
+        raise ValueError("No account selected")
+    if account_name not in ACCOUNTS:
+        raise ValueError(f"Account '{account_name}' not found. Available accounts: {list(ACCOUNTS.keys())}")
+    return account_name
+
+
+def get_account_domain(account_name: Optional[str]) -> str:
+    """Get the sending domain configured for an account"""
+    domain = ACCOUNTS.get(account_name, {}).get('domain')
+    if not domain:
+        raise ValueError(f"No domain configured for account '{account_name}'")
+    return domain
+
+
+def default_from_address(domain: str) -> str:
+    """Sender used when from_email is not given"""
+    # Use the domain name as the local part for the default email
+    domain_name = domain.split('.')[0]  # Gets 'projectwe' from 'projectwe.com'
+    return f"{domain_name}@{domain}"
 
 
 # Account Management Tools
@@ -124,7 +271,10 @@ async def list_accounts() -> str:
 
 @mcp.tool()
 async def switch_account(account_name: str) -> str:
-    """Switch to a different Mailgun account
+    """Switch the default Mailgun account
+    
+    The default is used by tools called without an account argument. Pass account
+    per call instead when several clients work with different accounts concurrently.
     
     Args:
         account_name: Name of the account to switch to
@@ -140,7 +290,7 @@ async def switch_account(account_name: str) -> str:
 
 @mcp.tool()
 async def get_current_account() -> str:
-    """Get the currently active Mailgun account"""
+    """Get the default Mailgun account used when a tool is called without an account"""
     if not CURRENT_ACCOUNT:
         return "No account currently selected"
     
@@ -151,6 +301,195 @@ async def get_current_account() -> str:
     }, indent=2)
 
 
+def resolve_attachment_paths(paths: List[str]) -> List[Tuple[Path, int]]:
+    """Validate attachment paths and return each resolved path with its size
+    
+    Relative paths are taken from MAILGUN_ATTACHMENT_ROOT. Symlinks are followed
+    before the check, so a link inside the root pointing outside it is rejected.
+    """
+    if not paths:
+        return []
+    if not MAILGUN_ATTACHMENT_ROOT:
+        raise ValueError("Attachments are disabled, set MAILGUN_ATTACHMENT_ROOT to the directory they may be read from")
+    root = Path(MAILGUN_ATTACHMENT_ROOT).resolve()
+    if len(paths) > MAILGUN_ATTACHMENT_MAX_OPEN_FILES:
+        raise ValueError(f"At most {MAILGUN_ATTACHMENT_MAX_OPEN_FILES} attachments per email")
+    
+    resolved = []
+    for raw_path in paths:
+        path = (root / Path(raw_path).expanduser()).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f"Attachment must be inside {root}: {raw_path}")
+        if not path.is_file():
+            raise ValueError(f"Attachment not found: {raw_path}")
+        resolved.append((path, path.stat().st_size))
+    
+    total = sum(size for _, size in resolved)
+    if total > MAILGUN_ATTACHMENT_MAX_BYTES:
+        raise ValueError(f"Attachments total {total} bytes, limit is {MAILGUN_ATTACHMENT_MAX_BYTES}")
+    return resolved
+
+
+@contextlib.asynccontextmanager
+async def open_attachments(attachments: List[Tuple[Path, int]]) -> AsyncIterator[List[Tuple[str, Tuple[str, Any, str]]]]:
+    """Open attachment files as multipart entries, waiting while too many files are open
+    
+    All slots for one email are reserved together, so two sends can never each hold
+    part of the budget and wait on the other.
+    """
+    global ATTACHMENT_SLOTS, OPEN_ATTACHMENTS
+    if ATTACHMENT_SLOTS is None:
+        ATTACHMENT_SLOTS = asyncio.Condition()
+    
+    needed = len(attachments)
+    async with ATTACHMENT_SLOTS:
+        await ATTACHMENT_SLOTS.wait_for(lambda: OPEN_ATTACHMENTS + needed <= MAILGUN_ATTACHMENT_MAX_OPEN_FILES)
+        OPEN_ATTACHMENTS += needed
+    
+    try:
+        with contextlib.ExitStack() as stack:
+            files = []
+            for path, _ in attachments:
+                content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                # The path was resolved without symlinks, refuse one swapped in since
+                fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+                files.append(("attachment", (path.name, stack.enter_context(os.fdopen(fd, "rb")), content_type)))
+            yield files
+    finally:
+        async with ATTACHMENT_SLOTS:
+            OPEN_ATTACHMENTS -= needed
+            ATTACHMENT_SLOTS.notify_all()
+
+
+# Send Rate Limiting
+
+class SendRateLimiter:
+    """Token bucket for one account/domain, refilled at the hourly rate of the current warm-up day"""
+    
+    def __init__(self, config: Dict[str, Any], name: str = "default"):
+        """Raises ValueError naming the MAILGUN_RATE_LIMITS entry when its config is invalid"""
+        if not isinstance(config, dict):
+            raise ValueError(f"Rate limit '{name}' must be an object with per_hour, burst or warmup")
+        warmup = config.get('warmup') or {}
+        try:
+            self.warmup_schedule = [float(rate) for rate in warmup.get('per_hour', [])]
+            self.per_hour = float(config.get('per_hour') or (self.warmup_schedule[-1] if self.warmup_schedule else 0))
+            self.burst = float(config['burst']) if config.get('burst') else None
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError(f"Rate limit '{name}': per_hour, burst and warmup.per_hour must be numbers")
+        if self.per_hour <= 0:
+            raise ValueError(f"Rate limit '{name}' needs per_hour or a warm-up schedule")
+        
+        self.warmup_start = None
+        if self.warmup_schedule:
+            if not warmup.get('start'):
+                raise ValueError(f"Rate limit '{name}': warmup needs a start date, e.g. \"2024-06-01\"")
+            try:
+                self.warmup_start = datetime.fromisoformat(str(warmup['start'])).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                raise ValueError(f"Rate limit '{name}': warmup start '{warmup['start']}' is not an ISO date")
+        
+        self.updated = time.time()
+        self.tokens = self.capacity()
+        self.sent: deque = deque()  # (time, source, recipients) of sends within the last hour
+        self.throttled_count = 0
+        self.throttled_seconds = 0.0
+        self.throttled_since: Optional[float] = None
+    
+    def warmup_day(self, now: float) -> Optional[int]:
+        if self.warmup_start is None:
+            return None
+        day = int((now - self.warmup_start) // 86400)
+        return day if 0 <= day < len(self.warmup_schedule) else None
+    
+    def limit_per_hour(self, now: float) -> float:
+        day = self.warmup_day(now)
+        if day is not None:
+            return self.warmup_schedule[day]
+        if self.warmup_start is not None and now < self.warmup_start:
+            return self.warmup_schedule[0]
+        return self.per_hour
+    
+    def capacity(self, now: Optional[float] = None) -> float:
+        # Default burst is one minute of sending, so a full bucket can't dump an hour at once
+        return float(self.burst or max(1.0, self.limit_per_hour(now or time.time()) / 60))
+    
+    def acquire(self, count: int = 1, source: str = "send") -> float:
+        """Take one token per recipient and return 0, or return the seconds until enough are available
+        
+        A count above the bucket capacity waits for a full bucket and leaves the
+        bucket in debt, so later sends are held back until the average rate recovers.
+        """
+        now = time.time()
+        rate = self.limit_per_hour(now) / 3600
+        capacity = self.capacity(now)
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        
+        needed = min(count, capacity)
+        if self.tokens >= needed:
+            self.tokens -= count
+            self.sent.append((now, source, count))
+            if self.throttled_since is not None:
+                self.throttled_seconds += now - self.throttled_since
+                self.throttled_since = None
+            return 0.0
+        
+        self.throttled_count += 1
+        if self.throttled_since is None:
+            self.throttled_since = now
+        return (needed - self.tokens) / rate
+    
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        while self.sent and self.sent[0][0] < now - 3600:
+            self.sent.popleft()
+        ongoing = now - self.throttled_since if self.throttled_since is not None else 0.0
+        by_source: Dict[str, int] = {}
+        for _, source, count in self.sent:
+            by_source[source] = by_source.get(source, 0) + count
+        return {
+            "limit_per_hour": self.limit_per_hour(now),
+            "warmup_day": self.warmup_day(now),
+            "sent_last_minute": sum(count for sent_at, _, count in self.sent if sent_at >= now - 60),
+            "sent_last_hour": sum(by_source.values()),
+            "sent_last_hour_by_source": by_source,
+            "tokens_available": round(min(self.capacity(now), self.tokens + (now - self.updated) * self.limit_per_hour(now) / 3600), 2),
+            "throttled": self.throttled_since is not None,
+            "throttled_count": self.throttled_count,
+            "throttled_seconds": round(self.throttled_seconds + ongoing, 1)
+        }
+
+
+def get_send_limiter(account_name: str, domain: str) -> Optional[SendRateLimiter]:
+    """Get the limiter for an account/domain, or None when no limit is configured"""
+    key = (account_name, domain)
+    if key not in SEND_LIMITERS:
+        name = next((name for name in (domain, account_name, 'default') if MAILGUN_RATE_LIMITS.get(name)), None)
+        if name is None:
+            return None
+        SEND_LIMITERS[key] = SendRateLimiter(MAILGUN_RATE_LIMITS[name], name)
+    return SEND_LIMITERS[key]
+
+
+def validate_rate_limits():
+    """Log invalid rate limit entries at startup; sends they apply to fail with the same error"""
+    for name, config in MAILGUN_RATE_LIMITS.items():
+        try:
+            SendRateLimiter(config, name)
+        except ValueError as e:
+            logger.error(f"{e}, sends it applies to will be rejected until it is fixed")
+
+
+validate_rate_limits()
+
+
+def acquire_send_slot(account_name: str, domain: str, count: int = 1, source: str = "send") -> float:
+    """Take a send token per recipient, returning 0 when sending may proceed or the seconds to wait"""
+    limiter = get_send_limiter(account_name, domain)
+    return limiter.acquire(count, source) if limiter else 0.0
+
+
 # Email Operations
 
 @mcp.tool()
@@ -159,9 +498,11 @@ async def send_email(
     subject: str,
     text: str,
     html: Optional[str] = None,
-    from_email: Optional[str] = None
+    from_email: Optional[str] = None,
+    attachments: Optional[List[str]] = None,
+    account: Optional[str] = None
 ) -> str:
-    """Send an email using the current Mailgun account
+    """Send an email using a Mailgun account
     
     Args:
         to: Recipient email address
@@ -169,12 +510,16 @@ async def send_email(
         text: Plain text body of the email
         html: HTML body of the email (optional)
         from_email: Sender email address (optional, uses domain default if not specified)
+        attachments: Local file paths to attach, streamed from disk (optional)
+        account: Account to use for this call (optional, defaults to the current account)
     """
-    account = ACCOUNTS.get(CURRENT_ACCOUNT, {})
-    domain = account.get('domain')
+    account_name = resolve_account(account)
+    domain = get_account_domain(account_name)
+    attachment_files = resolve_attachment_paths(attachments or [])
     
-    if not domain:
-        raise ValueError("No domain configured for current account")
+    wait = acquire_send_slot(account_name, domain)
+    if wait:
+        raise ValueError(f"Send rate limit reached for {domain}, next slot in {wait:.1f}s. Use queue_email to send when a slot opens.")
     
     # Prepare email data
     email_data = {
@@ -187,58 +532,514 @@ async def send_email(
     # if html:
     #     email_data['html'] = html
     
-    if from_email:
-        email_data['from'] = from_email
-    else:
-        # Use the domain name as the local part for the default email
-        domain_name = domain.split('.')[0]  # Gets 'projectwe' from 'projectwe.com'
-        email_data['from'] = f"{domain_name}@{domain}"
+    email_data['from'] = from_email or default_from_address(domain)
     
     # Send email
-    result = await make_mailgun_request(
-        "POST",
-        f"/{domain}/messages",
-        data=email_data
-    )
+    async with open_attachments(attachment_files) as files:
+        result = await make_mailgun_request(
+            "POST",
+            f"/{domain}/messages",
+            data=email_data,
+            account_name=account_name,
+            files=files or None
+        )
     
     return json.dumps({
         "status": "sent",
-        "account": CURRENT_ACCOUNT,
+        "account": account_name,
         "domain": domain,
+        "attachments": [path.name for path, _ in attachment_files],
         "message_id": result.get("id"),
         "message": result.get("message")
     }, indent=2)
 
 
-# Domain & Stats Operations
-
 @mcp.tool()
-async def get_domains() -> str:
-    """Get all domains for the current Mailgun account"""
-    result = await make_mailgun_request("GET", "/domains")
+async def send_bulk_email(
+    recipients: List[Union[str, Dict[str, Any]]],
+    subject: str,
+    text: str,
+    html: Optional[str] = None,
+    from_email: Optional[str] = None,
+    account: Optional[str] = None
+) -> str:
+    """Send one email to many recipients using Mailgun batch sending
+    
+    Recipients are packed up to 1,000 per request with recipient-variables, so each
+    recipient gets an individual message. Use %recipient.<key>% in the subject or body
+    to insert per-recipient values.
+    
+    On a rate-limited domain each recipient takes one send token. Batches wait up to
+    MAILGUN_BULK_MAX_WAIT seconds for tokens, then the rest go to the outbound queue.
+    
+    Args:
+        recipients: Email addresses, or objects with an "email" key plus template variables
+        subject: Email subject
+        text: Plain text body of the email
+        html: HTML body of the email (optional)
+        from_email: Sender email address (optional, uses domain default if not specified)
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    account_name = resolve_account(account)
+    domain = get_account_domain(account_name)
+    
+    # Normalise to {email: variables}, dropping duplicates
+    recipient_variables: Dict[str, Dict[str, Any]] = {}
+    invalid = []
+    for recipient in recipients:
+        variables = {"email": recipient} if isinstance(recipient, str) else dict(recipient)
+        email = str(variables.pop("email", "")).strip()
+        if "@" not in email:
+            invalid.append(recipient)
+            continue
+        recipient_variables.setdefault(email, variables)
+    
+    if not recipient_variables:
+        raise ValueError("No valid recipients provided")
+    
+    emails = list(recipient_variables)
+    # A rate-limited domain gets batches no larger than its bucket, so a batch never bursts past it
+    limiter = get_send_limiter(account_name, domain)
+    batch_size = min(MAILGUN_BATCH_SIZE, max(1, int(limiter.capacity()))) if limiter else MAILGUN_BATCH_SIZE
+    batches = [emails[i:i + batch_size] for i in range(0, len(emails), batch_size)]
+    semaphore = get_account_semaphore(account_name)
+    
+    def batch_data(batch: List[str]) -> Dict[str, Any]:
+        email_data = {
+            'to': batch,
+            'subject': subject,
+            'text': text,
+            'from': from_email or default_from_address(domain),
+            # Mailgun only sends individual messages when every recipient has an entry
+            'recipient-variables': json.dumps({email: recipient_variables[email] for email in batch})
+        }
+        if html:
+            email_data['html'] = html
+        return email_data
+    
+    async def send_batch(index: int, batch: List[str]) -> Dict:
+        async with semaphore:
+            try:
+                result = await make_mailgun_request("POST", f"/{domain}/messages", data=batch_data(batch), account_name=account_name)
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Batch {index} failed: {e}")
+                return {"batch": index, "recipients": batch, "error": str(e)}
+        
+        return {"batch": index, "recipients": batch, "message_id": result.get("id")}
+    
+    # Charge the limiter one token per recipient, in batch order. Batches still throttled
+    # after MAILGUN_BULK_MAX_WAIT go to the outbound queue, which sends them as tokens free up.
+    deadline = time.time() + MAILGUN_BULK_MAX_WAIT
+    tasks, deferred = [], []
+    for index, batch in enumerate(batches):
+        wait = 0.0 if deferred else acquire_send_slot(account_name, domain, len(batch), source="bulk")
+        while wait and time.time() + wait <= deadline:
+            await asyncio.sleep(wait)
+            wait = acquire_send_slot(account_name, domain, len(batch), source="bulk")
+        if wait or deferred:
+            deferred.append((index, batch))
+        else:
+            tasks.append(asyncio.create_task(send_batch(index, batch)))
+    
+    results = await asyncio.gather(*tasks)
+    queued = [
+        {"batch": index, "recipients": len(batch), "queue_id": enqueue_email(account_name, domain, batch_data(batch))}
+        for index, batch in deferred
+    ]
+    if queued:
+        ensure_queue_workers()
+        QUEUE_WAKEUP.set()
+    
+    failures = [result for result in results if "error" in result]
+    failed_recipients = sum(len(failure["recipients"]) for failure in failures)
+    queued_recipients = sum(item["recipients"] for item in queued)
+    
+    if failures:
+        status = "failed" if len(failures) == len(batches) else "partial"
+    else:
+        status = "queued" if len(queued) == len(batches) else ("partially_queued" if queued else "sent")
+    
     return json.dumps({
-        "account": CURRENT_ACCOUNT,
-        "domains": result.get("items", []),
-        "total": result.get("total_count", 0)
+        "status": status,
+        "account": account_name,
+        "domain": domain,
+        "total_recipients": len(emails),
+        "batches": len(batches),
+        "sent_recipients": len(emails) - failed_recipients - queued_recipients,
+        "failed_recipients": failed_recipients,
+        "queued_recipients": queued_recipients,
+        "queued_batches": queued,
+        "message_ids": [result["message_id"] for result in results if "error" not in result],
+        "failures": failures,
+        "invalid_recipients": invalid
     }, indent=2)
 
 
+# Outbound Queue
+
+def get_queue_db() -> sqlite3.Connection:
+    """Open the queue database, creating the schema on first use"""
+    global QUEUE_DB
+    if QUEUE_DB is None:
+        # Autocommit mode: every statement is durable as soon as it returns
+        QUEUE_DB = sqlite3.connect(MAILGUN_QUEUE_PATH, isolation_level=None, check_same_thread=False)
+        QUEUE_DB.row_factory = sqlite3.Row
+        QUEUE_DB.execute("PRAGMA journal_mode=WAL")
+        QUEUE_DB.executescript("""
+            CREATE TABLE IF NOT EXISTS outbound_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT UNIQUE,
+                account TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                message_id TEXT,
+                created_at REAL NOT NULL,
+                sent_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_outbound_queue_due ON outbound_queue (status, next_attempt_at);
+            CREATE INDEX IF NOT EXISTS idx_outbound_queue_sent ON outbound_queue (sent_at);
+        """)
+    return QUEUE_DB
+
+
+def enqueue_email(account_name: str, domain: str, email_data: Dict[str, Any], idempotency_key: Optional[str] = None) -> int:
+    """Store an email in the outbound queue and return its queue ID
+    
+    Raises sqlite3.IntegrityError when the idempotency key is already queued.
+    """
+    now = time.time()
+    cursor = get_queue_db().execute(
+        "INSERT INTO outbound_queue (idempotency_key, account, domain, payload, next_attempt_at, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (idempotency_key, account_name, domain, json.dumps(email_data), now, now)
+    )
+    return cursor.lastrowid
+
+
+def queue_row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "queue_id": row["id"],
+        "idempotency_key": row["idempotency_key"],
+        "account": row["account"],
+        "domain": row["domain"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "last_error": row["last_error"],
+        "message_id": row["message_id"],
+        "created_at": row["created_at"],
+        "sent_at": row["sent_at"]
+    }
+
+
+def claim_next_email() -> Optional[sqlite3.Row]:
+    """Mark the next due email as sending and return it
+    
+    Workers share the event loop thread, so the select and update cannot interleave.
+    """
+    db = get_queue_db()
+    row = db.execute(
+        "SELECT * FROM outbound_queue WHERE status = 'queued' AND next_attempt_at <= ? "
+        "ORDER BY next_attempt_at, id LIMIT 1",
+        (time.time(),)
+    ).fetchone()
+    if row is None:
+        return None
+    
+    db.execute("UPDATE outbound_queue SET status = 'sending', attempts = attempts + 1 WHERE id = ?", (row["id"],))
+    return row
+
+
+def retry_delay(attempts: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with jitter, honouring Retry-After when Mailgun sends it"""
+    if response is not None:
+        try:
+            return min(float(response.headers["Retry-After"]), MAILGUN_QUEUE_BACKOFF_MAX)
+        except (KeyError, ValueError):
+            pass
+    delay = min(MAILGUN_QUEUE_BACKOFF_BASE * 2 ** (attempts - 1), MAILGUN_QUEUE_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def deliver_queued_email(row: sqlite3.Row):
+    """Send one claimed email and record the outcome"""
+    db = get_queue_db()
+    attempts = row["attempts"] + 1
+    response = None
+    
+    try:
+        result = await make_mailgun_request(
+            "POST",
+            f"/{row['domain']}/messages",
+            data=json.loads(row["payload"]),
+            account_name=row["account"]
+        )
+    except httpx.HTTPStatusError as e:
+        response = e.response
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
+        retryable = response.status_code in RETRYABLE_STATUS_CODES
+    except httpx.TransportError as e:
+        error = f"Transport error: {e}"
+        retryable = True
+    except ValueError as e:
+        error = str(e)
+        retryable = False
+    else:
+        db.execute(
+            "UPDATE outbound_queue SET status = 'sent', message_id = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+            (result.get("id"), time.time(), row["id"])
+        )
+        return
+    
+    if retryable and attempts < MAILGUN_QUEUE_MAX_ATTEMPTS:
+        delay = retry_delay(attempts, response)
+        logger.warning(f"Queued email {row['id']} attempt {attempts} failed, retrying in {delay:.0f}s: {error}")
+        db.execute(
+            "UPDATE outbound_queue SET status = 'queued', next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (time.time() + delay, error, row["id"])
+        )
+    else:
+        logger.error(f"Queued email {row['id']} failed permanently: {error}")
+        db.execute("UPDATE outbound_queue SET status = 'failed', last_error = ? WHERE id = ?", (error, row["id"]))
+
+
+def defer_throttled_emails(row: sqlite3.Row, ready_at: float):
+    """Give back a claimed email and push every due email of its account/domain to the next send slot"""
+    db = get_queue_db()
+    db.execute(
+        "UPDATE outbound_queue SET status = 'queued', attempts = attempts - 1, next_attempt_at = ? WHERE id = ?",
+        (ready_at, row["id"])
+    )
+    db.execute(
+        "UPDATE outbound_queue SET next_attempt_at = ? "
+        "WHERE status = 'queued' AND account = ? AND domain = ? AND next_attempt_at < ?",
+        (ready_at, row["account"], row["domain"], ready_at)
+    )
+
+
+async def queue_worker(worker_id: int):
+    """Drain due emails, sleeping until woken by queue_email, the next due email or the poll interval"""
+    while True:
+        row = claim_next_email()
+        if row is None:
+            # Wake for the next scheduled retry or send slot if it comes before the poll interval
+            next_due = get_queue_db().execute(
+                "SELECT MIN(next_attempt_at) FROM outbound_queue WHERE status = 'queued'"
+            ).fetchone()[0]
+            timeout = MAILGUN_QUEUE_POLL_INTERVAL if next_due is None else min(MAILGUN_QUEUE_POLL_INTERVAL, max(next_due - time.time(), 0.01))
+            try:
+                await asyncio.wait_for(QUEUE_WAKEUP.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            QUEUE_WAKEUP.clear()
+            continue
+        
+        try:
+            # Batches queued by send_bulk_email are charged one token per recipient
+            recipients = json.loads(row["payload"])["to"]
+            count, source = (len(recipients), "bulk") if isinstance(recipients, list) else (1, "queue")
+            wait = acquire_send_slot(row["account"], row["domain"], count, source)
+            if wait:
+                defer_throttled_emails(row, time.time() + wait)
+                continue
+            await deliver_queued_email(row)
+        except Exception as e:
+            # Never lose the worker; put the email back for another attempt
+            logger.exception(f"Queue worker {worker_id} crashed on email {row['id']}")
+            get_queue_db().execute(
+                "UPDATE outbound_queue SET status = 'queued', next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + retry_delay(row["attempts"] + 1), str(e), row["id"])
+            )
+
+
+def ensure_queue_workers():
+    """Start the queue workers on the running event loop if they are not running yet"""
+    global QUEUE_WAKEUP
+    if any(not task.done() for task in QUEUE_WORKER_TASKS):
+        return
+    
+    # Emails left in 'sending' by a crash are retried
+    get_queue_db().execute("UPDATE outbound_queue SET status = 'queued' WHERE status = 'sending'")
+    
+    QUEUE_WAKEUP = asyncio.Event()
+    QUEUE_WORKER_TASKS[:] = [
+        asyncio.create_task(queue_worker(i), name=f"mailgun-queue-worker-{i}")
+        for i in range(MAILGUN_QUEUE_WORKERS)
+    ]
+    logger.info(f"Started {MAILGUN_QUEUE_WORKERS} Mailgun queue workers")
+
+
+async def stop_queue_workers():
+    for task in QUEUE_WORKER_TASKS:
+        task.cancel()
+    await asyncio.gather(*QUEUE_WORKER_TASKS, return_exceptions=True)
+    QUEUE_WORKER_TASKS.clear()
+
+
+@contextlib.asynccontextmanager
+async def run_queue_workers():
+    """Run the queue workers for the lifetime of the hub so a backlog left by a restart is drained"""
+    ensure_queue_workers()
+    try:
+        yield
+    finally:
+        await stop_queue_workers()
+
+
 @mcp.tool()
-async def get_stats(
-    event: str = "delivered",
-    duration: str = "7d"
+async def queue_email(
+    to: str,
+    subject: str,
+    text: str,
+    html: Optional[str] = None,
+    from_email: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    account: Optional[str] = None
 ) -> str:
-    """Get email statistics for the current account
+    """Queue an email for background delivery using a Mailgun account
+    
+    The email is stored on disk before this returns and is retried with backoff
+    on 429 and 5xx responses.
     
     Args:
-        event: Event type (accepted, delivered, failed, opened, clicked, unsubscribed, complained, stored)
-        duration: Duration (1d, 7d, 30d)
+        to: Recipient email address
+        subject: Email subject
+        text: Plain text body of the email
+        html: HTML body of the email (optional)
+        from_email: Sender email address (optional, uses domain default if not specified)
+        idempotency_key: Unique key for this email; queueing the same key again returns the existing entry (optional)
+        account: Account to use for this call (optional, defaults to the current account)
     """
-    account = ACCOUNTS.get(CURRENT_ACCOUNT, {})
-    domain = account.get('domain')
+    account_name = resolve_account(account)
+    domain = get_account_domain(account_name)
     
-    if not domain:
-        raise ValueError("No domain configured for current account")
+    email_data = {
+        'to': to,
+        'subject': subject,
+        'text': text,
+        'from': from_email or default_from_address(domain)
+    }
+    if html:
+        email_data['html'] = html
+    
+    db = get_queue_db()
+    try:
+        queue_id = enqueue_email(account_name, domain, email_data, idempotency_key)
+    except sqlite3.IntegrityError:
+        row = db.execute("SELECT * FROM outbound_queue WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return json.dumps({"duplicate": True, **queue_row_to_dict(row)}, indent=2)
+    
+    ensure_queue_workers()
+    QUEUE_WAKEUP.set()
+    
+    return json.dumps({
+        "status": "queued",
+        "queue_id": queue_id,
+        "idempotency_key": idempotency_key,
+        "account": account_name,
+        "domain": domain
+    }, indent=2)
+
+
+@mcp.tool()
+async def get_queued_email(queue_id: Optional[int] = None, idempotency_key: Optional[str] = None) -> str:
+    """Get the delivery status of a queued email
+    
+    Args:
+        queue_id: ID returned by queue_email (optional)
+        idempotency_key: Idempotency key given to queue_email (optional)
+    """
+    db = get_queue_db()
+    if queue_id is not None:
+        row = db.execute("SELECT * FROM outbound_queue WHERE id = ?", (queue_id,)).fetchone()
+    elif idempotency_key:
+        row = db.execute("SELECT * FROM outbound_queue WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+    else:
+        raise ValueError("Provide queue_id or idempotency_key")
+    
+    if row is None:
+        return "Error: Queued email not found"
+    
+    return json.dumps(queue_row_to_dict(row), indent=2)
+
+
+@mcp.tool()
+async def get_queue_status() -> str:
+    """Get outbound queue depth, throughput and worker state"""
+    db = get_queue_db()
+    now = time.time()
+    
+    counts = {row["status"]: row["total"] for row in db.execute(
+        "SELECT status, COUNT(*) AS total FROM outbound_queue GROUP BY status"
+    )}
+    oldest = db.execute("SELECT MIN(created_at) FROM outbound_queue WHERE status IN ('queued', 'sending')").fetchone()[0]
+    sent_last_minute = db.execute("SELECT COUNT(*) FROM outbound_queue WHERE sent_at >= ?", (now - 60,)).fetchone()[0]
+    sent_last_hour = db.execute("SELECT COUNT(*) FROM outbound_queue WHERE sent_at >= ?", (now - 3600,)).fetchone()[0]
+    
+    return json.dumps({
+        "depth": counts.get("queued", 0) + counts.get("sending", 0),
+        "by_status": counts,
+        "oldest_pending_age_seconds": round(now - oldest, 1) if oldest else None,
+        "sent_last_minute": sent_last_minute,
+        "sent_last_hour": sent_last_hour,
+        "throughput_per_minute": round(sent_last_hour / 60, 2),
+        "workers_running": sum(1 for task in QUEUE_WORKER_TASKS if not task.done())
+    }, indent=2)
+
+
+@mcp.tool()
+async def get_rate_limit_status() -> str:
+    """Get configured send rate limits with current rate, warm-up day and throttled time per account/domain"""
+    # Bulk batches waiting in the queue for send tokens, per account/domain
+    pending_bulk = {
+        (row["account"], row["domain"]): (row["batches"], row["recipients"])
+        for row in get_queue_db().execute(
+            "SELECT account, domain, COUNT(*) AS batches, SUM(json_array_length(payload, '$.to')) AS recipients "
+            "FROM outbound_queue WHERE status IN ('queued', 'sending') AND json_type(payload, '$.to') = 'array' "
+            "GROUP BY account, domain"
+        )
+    }
+    
+    limiters, invalid = [], {}
+    for account_name, account in ACCOUNTS.items():
+        try:
+            limiter = get_send_limiter(account_name, account.get('domain', ''))
+        except ValueError as e:
+            invalid[account_name] = str(e)
+            continue
+        if limiter:
+            batches, recipients = pending_bulk.get((account_name, account.get('domain')), (0, 0))
+            limiters.append({
+                "account": account_name,
+                "domain": account.get('domain'),
+                **limiter.metrics(),
+                "queued_bulk_batches": batches,
+                "queued_bulk_recipients": recipients
+            })
+    
+    return json.dumps({
+        "limiters": limiters,
+        "unlimited_accounts": [name for name in ACCOUNTS if name not in invalid and name not in {item["account"] for item in limiters}],
+        "invalid_limits": invalid
+    }, indent=2)
+
+
+# Domain & Stats Operations
+
+async def fetch_domains(account_name: str) -> Dict:
+    result = await make_mailgun_request("GET", "/domains", account_name=account_name)
+    return {
+        "account": account_name,
+        "domains": result.get("items", []),
+        "total": result.get("total_count", 0)
+    }
+
+
+async def fetch_stats(account_name: str, event: str, duration: str) -> Dict:
+    domain = get_account_domain(account_name)
     
     params = {
         "event": event,
@@ -248,54 +1049,435 @@ async def get_stats(
     result = await make_mailgun_request(
         "GET",
         f"/{domain}/stats/total",
-        params=params
+        params=params,
+        account_name=account_name
     )
     
-    return json.dumps({
-        "account": CURRENT_ACCOUNT,
+    return {
+        "account": account_name,
         "domain": domain,
         "stats": result.get("stats", []),
         "resolution": result.get("resolution")
-    }, indent=2)
+    }
+
+
+async def fetch_events(account_name: str, limit: int, event: Optional[str]) -> Dict:
+    domain = get_account_domain(account_name)
+    
+    params = {
+        "limit": min(max(limit, 1), 300)  # Clamp between 1 and 300
+    }
+    
+    if event:
+        params["event"] = event
+    
+    result = await make_mailgun_request(
+        "GET",
+        f"/{domain}/events",
+        params=params,
+        account_name=account_name
+    )
+    
+    return {
+        "account": account_name,
+        "domain": domain,
+        "events": result.get("items", []),
+        "count": len(result.get("items", []))
+    }
+
+
+@mcp.tool()
+async def get_domains(account: Optional[str] = None) -> str:
+    """Get all domains for a Mailgun account
+    
+    Args:
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    return json.dumps(await fetch_domains(resolve_account(account)), indent=2)
+
+
+@mcp.tool()
+async def get_stats(
+    event: str = "delivered",
+    duration: str = "7d",
+    account: Optional[str] = None
+) -> str:
+    """Get email statistics for a Mailgun account
+    
+    Args:
+        event: Event type (accepted, delivered, failed, opened, clicked, unsubscribed, complained, stored)
+        duration: Duration (1d, 7d, 30d)
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    return json.dumps(await fetch_stats(resolve_account(account), event, duration), indent=2)
 
 
 @mcp.tool()
 async def get_events(
     limit: int = 25,
-    event: Optional[str] = None
+    event: Optional[str] = None,
+    account: Optional[str] = None
 ) -> str:
-    """Get recent events for the current account
+    """Get recent events for a Mailgun account
     
     Args:
         limit: Number of events to retrieve (1-300)
         event: Filter by event type (optional)
+        account: Account to use for this call (optional, defaults to the current account)
     """
-    account = ACCOUNTS.get(CURRENT_ACCOUNT, {})
-    domain = account.get('domain')
+    return json.dumps(await fetch_events(resolve_account(account), limit, event), indent=2)
+
+
+# Multi-Account Operations
+
+def resolve_account_names(accounts: Union[List[str], str, None]) -> List[str]:
+    """Expand "all" (or nothing) to every configured account and validate explicit names"""
+    if accounts is None or accounts == "all":
+        return list(ACCOUNTS)
+    if isinstance(accounts, str):
+        accounts = [accounts]
     
-    if not domain:
-        raise ValueError("No domain configured for current account")
+    unknown = [name for name in accounts if name not in ACCOUNTS]
+    if unknown:
+        raise ValueError(f"Unknown accounts: {unknown}. Available accounts: {list(ACCOUNTS.keys())}")
+    return list(dict.fromkeys(accounts))
+
+
+async def fan_out(account_names: List[str], fetch) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """Run fetch(account_name) for every account concurrently, isolating per-account errors"""
+    async def run(account_name: str):
+        async with get_account_semaphore(account_name):
+            try:
+                return account_name, await fetch(account_name), None
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Account '{account_name}' failed: {e}")
+                return account_name, None, str(e)
     
-    params = {
-        "limit": min(max(limit, 1), 300)  # Clamp between 1 and 300
+    results, errors = {}, {}
+    for account_name, result, error in await asyncio.gather(*(run(name) for name in account_names)):
+        if error is None:
+            results[account_name] = result
+        else:
+            errors[account_name] = error
+    return results, errors
+
+
+def stat_total(entry: Dict, event: str) -> int:
+    """Total count for one stats bucket; failed events are split into temporary and permanent"""
+    counts = entry.get(event) or {}
+    if "total" in counts:
+        return counts["total"] or 0
+    return sum((value or {}).get("total", 0) for value in counts.values() if isinstance(value, dict))
+
+
+@mcp.tool()
+async def get_domains_multi(accounts: Union[List[str], str] = "all") -> str:
+    """Get domains for several Mailgun accounts at once
+    
+    Args:
+        accounts: List of account names, or "all" for every configured account
+    """
+    account_names = resolve_account_names(accounts)
+    results, errors = await fan_out(account_names, fetch_domains)
+    
+    return json.dumps({
+        "accounts": results,
+        "errors": errors,
+        "total_domains": sum(result["total"] for result in results.values())
+    }, indent=2)
+
+
+@mcp.tool()
+async def get_stats_multi(
+    accounts: Union[List[str], str] = "all",
+    event: str = "delivered",
+    duration: str = "7d"
+) -> str:
+    """Get email statistics for several Mailgun accounts at once
+    
+    Args:
+        accounts: List of account names, or "all" for every configured account
+        event: Event type (accepted, delivered, failed, opened, clicked, unsubscribed, complained, stored)
+        duration: Duration (1d, 7d, 30d)
+    """
+    account_names = resolve_account_names(accounts)
+    results, errors = await fan_out(account_names, lambda name: fetch_stats(name, event, duration))
+    
+    totals = {
+        name: sum(stat_total(entry, event) for entry in result["stats"])
+        for name, result in results.items()
     }
     
+    return json.dumps({
+        "event": event,
+        "duration": duration,
+        "totals": totals,
+        "combined_total": sum(totals.values()),
+        "accounts": results,
+        "errors": errors
+    }, indent=2)
+
+
+@mcp.tool()
+async def get_events_multi(
+    accounts: Union[List[str], str] = "all",
+    limit: int = 25,
+    event: Optional[str] = None
+) -> str:
+    """Get recent events for several Mailgun accounts at once, merged newest first
+    
+    Args:
+        accounts: List of account names, or "all" for every configured account
+        limit: Number of events to retrieve per account (1-300)
+        event: Filter by event type (optional)
+    """
+    account_names = resolve_account_names(accounts)
+    results, errors = await fan_out(account_names, lambda name: fetch_events(name, limit, event))
+    
+    events = [
+        {"account": name, **item}
+        for name, result in results.items()
+        for item in result["events"]
+    ]
+    events.sort(key=lambda item: item.get("timestamp") or 0, reverse=True)
+    
+    return json.dumps({
+        "events": events,
+        "count": len(events),
+        "per_account": {name: result["count"] for name, result in results.items()},
+        "errors": errors
+    }, indent=2)
+
+
+
+# Event Export
+
+async def iter_event_pages(domain: str, params: Dict, account_name: Optional[str] = None) -> AsyncIterator[List[Dict]]:
+    """Yield pages of events, following Mailgun's paging.next cursors until an empty page"""
+    endpoint, request_params = f"/{domain}/events", params
+    while True:
+        result = await make_mailgun_request("GET", endpoint, params=request_params, account_name=account_name)
+        items = result.get("items", [])
+        if not items:
+            return
+        yield items
+        
+        next_url = result.get("paging", {}).get("next")
+        if not next_url:
+            return
+        # The cursor URL already carries every filter
+        endpoint, request_params = next_url, None
+
+
+def resolve_export_path(output_path: str) -> Path:
+    """Resolve an export file name inside MAILGUN_EXPORT_DIR, rejecting paths that escape it"""
+    export_dir = Path(MAILGUN_EXPORT_DIR).resolve()
+    path = (export_dir / output_path).resolve()
+    if export_dir not in path.parents:
+        raise ValueError(f"Export path must be inside {export_dir}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def write_export_state(state_path: Path, state: Dict):
+    # Write then rename so a crash never leaves a half-written state file
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(state))
+    os.replace(tmp_path, state_path)
+
+
+@mcp.tool()
+async def export_events(
+    output_path: str,
+    begin: Optional[str] = None,
+    end: Optional[str] = None,
+    event: Optional[str] = None,
+    incremental: bool = False,
+    account: Optional[str] = None
+) -> str:
+    """Export every event in a time range to an NDJSON file, following paging cursors
+    
+    Events are written page by page, so memory stays flat however many there are.
+    
+    Args:
+        output_path: File name inside the export directory (MAILGUN_EXPORT_DIR)
+        begin: Start of the range, RFC 2822 date or epoch seconds (default: 30 days ago)
+        end: End of the range, RFC 2822 date or epoch seconds (default: now)
+        event: Filter by event type (optional)
+        incremental: Append to the file, resuming after the last exported event
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    account_name = resolve_account(account)
+    domain = get_account_domain(account_name)
+    
+    path = resolve_export_path(output_path)
+    state_path = path.with_name(path.name + ".state.json")
+    
+    # The state file records the newest exported timestamp and the event IDs at it
+    state = {"last_timestamp": None, "last_ids": []}
+    if incremental and state_path.exists() and path.exists():
+        state = json.loads(state_path.read_text())
+    
+    if incremental and state["last_timestamp"] is not None:
+        begin = str(state["last_timestamp"])
+    elif begin is None:
+        begin = str(time.time() - MAILGUN_EVENTS_RETENTION)
+    
+    params = {
+        "begin": begin,
+        "ascending": "yes",
+        "limit": MAILGUN_EVENTS_PAGE_SIZE
+    }
+    if end:
+        params["end"] = end
     if event:
         params["event"] = event
     
-    result = await make_mailgun_request(
-        "GET",
-        f"/{domain}/events",
-        params=params
-    )
+    seen_at_last = set(state["last_ids"])
+    written = 0
+    pages = 0
+    first_timestamp = None
+    
+    with open(path, "a" if incremental else "w", encoding="utf-8") as f:
+        async for items in iter_event_pages(domain, params, account_name=account_name):
+            pages += 1
+            for item in items:
+                timestamp = item.get("timestamp")
+                # begin is inclusive, skip what the previous run already wrote
+                if state["last_timestamp"] is not None and timestamp is not None:
+                    if timestamp < state["last_timestamp"] or (timestamp == state["last_timestamp"] and item.get("id") in seen_at_last):
+                        continue
+                
+                f.write(json.dumps(item, separators=(",", ":")) + "\n")
+                written += 1
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                
+                if timestamp is not None:
+                    if timestamp != state["last_timestamp"]:
+                        state["last_timestamp"] = timestamp
+                        seen_at_last = set()
+                    seen_at_last.add(item.get("id"))
+            
+            f.flush()
+            state["last_ids"] = list(seen_at_last)
+            write_export_state(state_path, state)
     
     return json.dumps({
-        "account": CURRENT_ACCOUNT,
+        "account": account_name,
         "domain": domain,
-        "events": result.get("items", []),
-        "count": len(result.get("items", []))
+        "output_path": str(path),
+        "incremental": incremental,
+        "events_written": written,
+        "pages": pages,
+        "first_timestamp": first_timestamp,
+        "last_timestamp": state["last_timestamp"]
+    }, indent=2)
+
+
+# Event Store & Analytics
+
+def get_event_store(account_name: str) -> EventStore:
+    """Get the account's event store with any new segments loaded"""
+    if account_name not in EVENT_STORES:
+        EVENT_STORES[account_name] = EventStore(MAILGUN_EVENT_STORE_DIR, account_name)
+    return EVENT_STORES[account_name].load()
+
+
+@mcp.tool()
+async def ingest_events(begin: Optional[str] = None, end: Optional[str] = None, account: Optional[str] = None) -> str:
+    """Pull events for a Mailgun account into the local columnar event store
+    
+    Without begin, ingestion resumes from the newest stored event (or 30 days ago
+    for an empty store). Events are written in segments so memory stays bounded;
+    events already stored are skipped and small segments are merged.
+    
+    Args:
+        begin: Start of the range, RFC 2822 date or epoch seconds (optional)
+        end: End of the range, RFC 2822 date or epoch seconds (optional)
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    account_name = resolve_account(account)
+    domain = get_account_domain(account_name)
+    
+    store = await asyncio.to_thread(get_event_store, account_name)
+    if begin is None:
+        last_timestamp = store.last_timestamp()
+        begin = str(last_timestamp if last_timestamp is not None else time.time() - MAILGUN_EVENTS_RETENTION)
+    
+    params = {
+        "begin": begin,
+        "ascending": "yes",
+        "limit": MAILGUN_EVENTS_PAGE_SIZE
+    }
+    if end:
+        params["end"] = end
+    
+    buffer: List[Dict] = []
+    ingested = 0
+    async for items in iter_event_pages(domain, params, account_name=account_name):
+        buffer.extend(items)
+        if len(buffer) >= MAILGUN_INGEST_SEGMENT_SIZE:
+            ingested += await asyncio.to_thread(store.append, buffer)
+            buffer = []
+    if buffer:
+        ingested += await asyncio.to_thread(store.append, buffer)
+    
+    # Frequent small ingests would otherwise leave load() reading many tiny segments
+    compacted = await asyncio.to_thread(store.compact)
+    store = await asyncio.to_thread(get_event_store, account_name)
+    return json.dumps({
+        "account": account_name,
+        "domain": domain,
+        "ingested": ingested,
+        "segments_compacted": compacted,
+        "events_in_store": store.size,
+        "last_timestamp": store.last_timestamp()
+    }, indent=2)
+
+
+@mcp.tool()
+async def aggregate_events(
+    group_by: List[str],
+    event: Optional[str] = None,
+    tag: Optional[str] = None,
+    recipient_domain: Optional[str] = None,
+    begin: Optional[float] = None,
+    end: Optional[float] = None,
+    limit: int = 100,
+    account: Optional[str] = None
+) -> str:
+    """Count stored events grouped by any combination of dimensions
+    
+    Runs against the local event store filled by ingest_events, without calling Mailgun.
+    
+    Args:
+        group_by: Dimensions to group by: event, domain, recipient_domain, tag, severity, hour, day, hour_of_day
+        event: Only count this event type (optional)
+        tag: Only count events with this tag (optional)
+        recipient_domain: Only count events for this recipient domain (optional)
+        begin: Start of the range in epoch seconds (optional)
+        end: End of the range in epoch seconds (optional)
+        limit: Maximum groups to return, largest first
+        account: Account to use for this call (optional, defaults to the current account)
+    """
+    account_name = resolve_account(account)
+    
+    filters = {name: value for name, value in (("event", event), ("tag", tag), ("recipient_domain", recipient_domain)) if value}
+    
+    store = await asyncio.to_thread(get_event_store, account_name)
+    started = time.perf_counter()
+    result = store.aggregate(group_by, filters=filters, begin=begin, end=end, limit=limit)
+    
+    return json.dumps({
+        "account": account_name,
+        "group_by": group_by,
+        "filters": filters,
+        "events_in_store": store.size,
+        "query_ms": round((time.perf_counter() - started) * 1000, 2),
+        **result
     }, indent=2)
 
 
 if __name__ == "__main__":
-    mcp.run(transport="streamable-http")
\ No newline at end of file
+    mcp.run(transport="streamable-http")
@@ -1,10 +1,11 @@
 from fastapi import FastAPI
-from fireflies_server import mcp as fireflies_mcp
+from fireflies_server import mcp as fireflies_mcp, run_transcript_sync
 from github_server import mcp as github_mcp  
 from prd_server import mcp as prd_mcp
 from vimeo_server import mcp as vimeo_mcp
-from mailgun_server import mcp as mailgun_mcp
+from mailgun_server import mcp as mailgun_mcp, close_mailgun_clients, run_queue_workers
 from dashboard_server import mcp as dashboard_mcp
+from docs_search_server import mcp as docs_search_mcp, run_docs_index
 
 import os
 import contextlib
@@ -20,6 +21,15 @@ async def lifespan(app: FastAPI):
         await stack.enter_async_context(vimeo_mcp.session_manager.run())
         await stack.enter_async_context(mailgun_mcp.session_manager.run())
         await stack.enter_async_context(dashboard_mcp.session_manager.run())
+        await stack.enter_async_context(docs_search_mcp.session_manager.run())
+        # Close the pooled Mailgun connections on shutdown
+        stack.push_async_callback(close_mailgun_clients)
+        # Drain the Mailgun outbound queue in the background
+        await stack.enter_async_context(run_queue_workers())
+        # Keep the Fireflies transcript cache in sync in the background
+        await stack.enter_async_context(run_transcript_sync())
+        # Load the docs embedding matrix once at startup
+        await stack.enter_async_context(run_docs_index())
         yield
 
 # Create FastAPI app with lifespan
@@ -37,6 +47,7 @@ app.mount("/prd", prd_mcp.streamable_http_app())
 app.mount("/vimeo", vimeo_mcp.streamable_http_app())
 app.mount("/mailgun", mailgun_mcp.streamable_http_app())
 app.mount("/dashboard", dashboard_mcp.streamable_http_app())
+app.mount("/docs-search", docs_search_mcp.streamable_http_app())
 
 
 PORT = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,192 @@
+"""Outbound queue delivery against a mocked Mailgun API"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import mailgun_server
+
+
+ACCOUNT = "test"
+DOMAIN = "example.com"
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    """Point the queue at a fresh database with one account, no send limits and fast retries"""
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_PATH", str(tmp_path / "queue.db"))
+    monkeypatch.setattr(mailgun_server, "QUEUE_DB", None)
+    monkeypatch.setattr(mailgun_server, "QUEUE_WORKER_TASKS", [])
+    monkeypatch.setattr(mailgun_server, "ACCOUNTS", {ACCOUNT: {"api_key": "key", "domain": DOMAIN}})
+    monkeypatch.setattr(mailgun_server, "CURRENT_ACCOUNT", ACCOUNT)
+    monkeypatch.setattr(mailgun_server, "MAILGUN_CLIENTS", {})
+    monkeypatch.setattr(mailgun_server, "STALE_CLIENTS", [])
+    monkeypatch.setattr(mailgun_server, "MAILGUN_RATE_LIMITS", {})
+    monkeypatch.setattr(mailgun_server, "SEND_LIMITERS", {})
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_BACKOFF_BASE", 0.05)
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_POLL_INTERVAL", 0.05)
+    yield
+    if mailgun_server.QUEUE_DB is not None:
+        mailgun_server.QUEUE_DB.close()
+
+
+class FakeMailgun:
+    """Answers message posts with the given status codes in order, then 200"""
+
+    def __init__(self, *statuses, headers=None):
+        self.statuses = list(statuses)
+        self.headers = headers or {}
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((time.monotonic(), request))
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            return httpx.Response(200, json={"id": f"<{len(self.requests)}@{DOMAIN}>", "message": "Queued. Thank you."})
+        return httpx.Response(status, headers=self.headers, text="try again later" if status >= 429 else "bad request")
+
+    def install(self):
+        client = httpx.AsyncClient(base_url=mailgun_server.MAILGUN_API_BASE, transport=httpx.MockTransport(self.handler))
+        mailgun_server.MAILGUN_CLIENTS[ACCOUNT] = ("key", client)
+
+
+def get_row(queue_id):
+    return mailgun_server.get_queue_db().execute("SELECT * FROM outbound_queue WHERE id = ?", (queue_id,)).fetchone()
+
+
+async def wait_for_status(queue_id, statuses=("sent", "failed"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        row = get_row(queue_id)
+        if row["status"] in statuses:
+            return row
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"queued email {queue_id} stuck in {get_row(queue_id)['status']}")
+
+
+async def queue_and_wait(mailgun, **kwargs):
+    mailgun.install()
+    try:
+        queued = json.loads(await mailgun_server.queue_email(to="user@example.org", subject="Hi", text="Hello", **kwargs))
+        return await wait_for_status(queued["queue_id"])
+    finally:
+        await mailgun_server.stop_queue_workers()
+        await mailgun_server.close_mailgun_clients()
+
+
+@pytest.mark.parametrize("statuses", [(429,), (500,), (502, 503, 504)])
+def test_retryable_responses_are_retried_until_sent(queue, statuses):
+    mailgun = FakeMailgun(*statuses)
+    row = asyncio.run(queue_and_wait(mailgun))
+
+    assert row["status"] == "sent"
+    assert row["attempts"] == len(statuses) + 1
+    assert row["message_id"] == f"<{len(statuses) + 1}@{DOMAIN}>"
+    assert row["last_error"] is None
+    assert len(mailgun.requests) == len(statuses) + 1
+
+    # Each retry waits at least half its backoff step
+    times = [sent_at for sent_at, _ in mailgun.requests]
+    for attempt, (previous, current) in enumerate(zip(times, times[1:]), start=1):
+        assert current - previous >= mailgun_server.MAILGUN_QUEUE_BACKOFF_BASE * 2 ** (attempt - 1) * 0.5
+
+
+def test_retry_after_header_is_honoured(queue):
+    mailgun = FakeMailgun(429, headers={"Retry-After": "0.3"})
+    row = asyncio.run(queue_and_wait(mailgun))
+
+    assert row["status"] == "sent"
+    (first, _), (second, _) = mailgun.requests
+    assert second - first >= 0.3
+
+
+def test_retry_delay_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_BACKOFF_BASE", 2)
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_BACKOFF_MAX", 900)
+
+    for attempts in range(1, 6):
+        step = 2 * 2 ** (attempts - 1)
+        assert step * 0.5 <= mailgun_server.retry_delay(attempts) <= step
+    assert 450 <= mailgun_server.retry_delay(20) <= 900
+
+    assert mailgun_server.retry_delay(1, httpx.Response(429, headers={"Retry-After": "30"})) == 30
+    assert mailgun_server.retry_delay(1, httpx.Response(429, headers={"Retry-After": "3600"})) == 900
+    assert 1 <= mailgun_server.retry_delay(1, httpx.Response(429, headers={"Retry-After": "soon"})) <= 2
+
+
+def test_client_error_fails_permanently(queue):
+    mailgun = FakeMailgun(400)
+    row = asyncio.run(queue_and_wait(mailgun))
+
+    assert row["status"] == "failed"
+    assert row["attempts"] == 1
+    assert row["last_error"].startswith("HTTP 400")
+    assert len(mailgun.requests) == 1
+
+
+def test_retries_stop_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(mailgun_server, "MAILGUN_QUEUE_MAX_ATTEMPTS", 3)
+    mailgun = FakeMailgun(503, 503, 503, 503)
+    row = asyncio.run(queue_and_wait(mailgun))
+
+    assert row["status"] == "failed"
+    assert row["attempts"] == 3
+    assert row["last_error"].startswith("HTTP 503")
+    assert len(mailgun.requests) == 3
+
+
+def test_duplicate_idempotency_key_is_sent_once(queue):
+    mailgun = FakeMailgun()
+
+    async def scenario():
+        mailgun.install()
+        try:
+            first = json.loads(await mailgun_server.queue_email(to="user@example.org", subject="Hi", text="Hello", idempotency_key="welcome-1"))
+            second = json.loads(await mailgun_server.queue_email(to="user@example.org", subject="Hi again", text="Hello", idempotency_key="welcome-1"))
+            await wait_for_status(first["queue_id"])
+            third = json.loads(await mailgun_server.queue_email(to="user@example.org", subject="Hi", text="Hello", idempotency_key="welcome-1"))
+            return first, second, third
+        finally:
+            await mailgun_server.stop_queue_workers()
+            await mailgun_server.close_mailgun_clients()
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first["status"] == "queued"
+    assert second["duplicate"] is True
+    assert second["queue_id"] == first["queue_id"]
+    assert third["duplicate"] is True
+    assert third["status"] == "sent"
+    assert mailgun_server.get_queue_db().execute("SELECT COUNT(*) FROM outbound_queue").fetchone()[0] == 1
+    assert len(mailgun.requests) == 1
+
+
+def test_rows_left_sending_by_a_crash_are_delivered(queue):
+    queue_id = mailgun_server.enqueue_email(ACCOUNT, DOMAIN, {"to": "user@example.org", "subject": "Hi", "text": "Hello", "from": f"noreply@{DOMAIN}"})
+    assert mailgun_server.claim_next_email()["id"] == queue_id
+
+    # Simulate a restart: the claimed row is still marked sending in the database
+    mailgun_server.QUEUE_DB.close()
+    mailgun_server.QUEUE_DB = None
+    assert get_row(queue_id)["status"] == "sending"
+
+    mailgun = FakeMailgun()
+
+    async def scenario():
+        mailgun.install()
+        try:
+            mailgun_server.ensure_queue_workers()
+            return await wait_for_status(queue_id)
+        finally:
+            await mailgun_server.stop_queue_workers()
+            await mailgun_server.close_mailgun_clients()
+
+    row = asyncio.run(scenario())
+
+    assert row["status"] == "sent"
+    assert row["attempts"] == 2
+    assert len(mailgun.requests) == 1
+    assert json.loads(row["payload"])["to"] == "user@example.org"
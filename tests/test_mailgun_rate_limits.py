@@ -0,0 +1,59 @@
+"""Loading and validating MAILGUN_RATE_LIMITS"""
+
+import json
+
+import pytest
+
+import mailgun_server
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(mailgun_server, "MAILGUN_RATE_LIMITS", {})
+    monkeypatch.setattr(mailgun_server, "SEND_LIMITERS", {})
+
+    def load(value):
+        monkeypatch.setenv("MAILGUN_RATE_LIMITS", value)
+        mailgun_server.load_rate_limits()
+        return mailgun_server.MAILGUN_RATE_LIMITS
+
+    return load
+
+
+@pytest.mark.parametrize("value", ["{not json", "[1, 2]", '"5000"'])
+def test_invalid_json_falls_back_to_no_limits(limits, value):
+    assert limits(value) == {}
+    assert mailgun_server.acquire_send_slot("test", "example.com") == 0
+
+
+def test_valid_limits_are_loaded(limits):
+    config = {"example.com": {"per_hour": 3600, "burst": 2}}
+    assert limits(json.dumps(config)) == config
+
+    assert mailgun_server.acquire_send_slot("test", "example.com", 2) == 0
+    assert mailgun_server.acquire_send_slot("test", "example.com") > 0
+
+
+@pytest.mark.parametrize("config, message", [
+    ({"warmup": {"per_hour": [100, 300]}}, "warmup needs a start date"),
+    ({"warmup": {"start": "June 1st", "per_hour": [100]}}, "is not an ISO date"),
+    ({"per_hour": "lots"}, "must be numbers"),
+    ({"burst": 10}, "needs per_hour or a warm-up schedule"),
+    (5000, "must be an object"),
+])
+def test_invalid_entry_is_rejected_with_its_name(limits, config, message):
+    limits(json.dumps({"example.com": config}))
+
+    with pytest.raises(ValueError, match=f"'example.com'.*{message}"):
+        mailgun_server.acquire_send_slot("test", "example.com")
+
+
+def test_warmup_schedule_sets_the_hourly_limit(limits):
+    limits(json.dumps({"default": {"per_hour": 5000, "warmup": {"start": "2024-06-01", "per_hour": [100, 300]}}}))
+
+    limiter = mailgun_server.get_send_limiter("test", "example.com")
+    june_2 = limiter.warmup_start + 86400 + 60
+
+    assert limiter.limit_per_hour(limiter.warmup_start + 60) == 100
+    assert limiter.limit_per_hour(june_2) == 300
+    assert limiter.limit_per_hour(june_2 + 86400) == 5000
@@ -0,0 +1,218 @@
+"""Pinecone upsert batching, retries and namespace swaps against a fake index"""
+
+import json
+import os
+import threading
+
+import pytest
+
+# The module builds its API clients on import; none of these tests call them
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PINECONE_API_KEY", "test")
+import generate_embeddings  # noqa: E402
+
+
+class ApiError(Exception):
+    """Stands in for Pinecone's API exceptions, which carry the HTTP status"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class FakeIndex:
+    """In-memory index; fail(batch, namespace) returns an exception to raise instead of upserting"""
+
+    def __init__(self, namespaces=None, fail=None):
+        self.namespaces = {name: dict(vectors) for name, vectors in (namespaces or {}).items()}
+        self.fail = fail or (lambda batch, namespace: None)
+        self.upserts = []
+        self.deleted = []
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors, namespace):
+        with self.lock:
+            self.upserts.append((namespace, [record["id"] for record in vectors]))
+            error = self.fail(vectors, namespace)
+            if error:
+                raise error
+            self.namespaces.setdefault(namespace, {}).update((record["id"], record) for record in vectors)
+
+    def delete(self, delete_all=False, namespace=None):
+        assert delete_all
+        with self.lock:
+            if namespace not in self.namespaces:
+                raise ApiError(404)
+            self.deleted.append(namespace)
+            self.namespaces.pop(namespace, None)
+
+
+def make_records(count, dims=4, text="chunk"):
+    return [
+        {"id": f"doc-{i}", "values": [0.1] * dims, "metadata": {"text": text, "filename": "doc.md", "chunk_index": i}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting"""
+    delays = []
+    monkeypatch.setattr(generate_embeddings.time, "sleep", delays.append)
+    return delays
+
+
+# Batching
+
+def test_batches_split_by_count():
+    records = make_records(25)
+    batches = generate_embeddings.make_upsert_batches(records, max_count=10)
+
+    assert [len(batch) for batch, _ in batches] == [10, 10, 5]
+    assert [record["id"] for batch, _ in batches for record in batch] == [record["id"] for record in records]
+
+
+def test_batches_split_by_bytes():
+    records = make_records(10, text="x" * 1000)
+    record_bytes = len(json.dumps(records[0])) + 1
+    # Three records fit under the 95% headroom, four do not
+    max_bytes = int(record_bytes * 3.5 / 0.95)
+    batches = generate_embeddings.make_upsert_batches(records, max_count=1000, max_bytes=max_bytes)
+
+    assert [len(batch) for batch, _ in batches] == [3, 3, 3, 1]
+    for batch, batch_bytes in batches:
+        assert batch_bytes == sum(len(json.dumps(record)) + 1 for record in batch)
+        assert batch_bytes <= max_bytes * 0.95
+
+
+def test_oversized_record_is_rejected():
+    with pytest.raises(ValueError, match="doc-0"):
+        generate_embeddings.make_upsert_batches(make_records(1, text="x" * 5000), max_bytes=4096)
+
+
+# Retries
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_upsert_retries_rate_limits_and_server_errors(sleeps, status):
+    errors = [ApiError(status), ApiError(status)]
+    index = FakeIndex(fail=lambda batch, namespace: errors.pop(0) if errors else None)
+    batch = make_records(3)
+
+    result = generate_embeddings.upsert_batch(index, batch, 300, "docs-new", 0)
+
+    assert result["attempts"] == 3
+    assert result["vectors"] == 3
+    assert len(index.upserts) == 3
+    assert len(index.namespaces["docs-new"]) == 3
+    # Backoff doubles per attempt, with jitter between half and the full step
+    assert 1 <= sleeps[0] <= 2
+    assert 2 <= sleeps[1] <= 4
+
+
+def test_upsert_gives_up_after_retries(sleeps):
+    index = FakeIndex(fail=lambda batch, namespace: ApiError(503))
+
+    with pytest.raises(ApiError):
+        generate_embeddings.upsert_batch(index, make_records(3), 300, "docs-new", 0)
+
+    assert len(index.upserts) == generate_embeddings.PINECONE_RETRIES
+    assert len(sleeps) == generate_embeddings.PINECONE_RETRIES - 1
+
+
+def test_upsert_does_not_retry_client_errors(sleeps):
+    index = FakeIndex(fail=lambda batch, namespace: ApiError(400))
+
+    with pytest.raises(ApiError):
+        generate_embeddings.upsert_batch(index, make_records(3), 300, "docs-new", 0)
+
+    assert len(index.upserts) == 1
+    assert sleeps == []
+
+
+# Namespace swap
+
+@pytest.fixture
+def state_path(tmp_path):
+    path = tmp_path / "pinecone_namespace.json"
+    path.write_text(json.dumps({"index": "docs", "active_namespace": "docs-old", "vector_count": 1}))
+    return str(path)
+
+
+def test_reindex_swaps_namespace_and_deletes_previous(sleeps, state_path):
+    records = make_records(2500)
+    index = FakeIndex(namespaces={"docs-old": {"doc-0": {}}})
+
+    stats = generate_embeddings.reindex_pinecone(records, index=index, state_path=state_path)
+
+    namespace = stats["namespace"]
+    assert namespace.startswith("docs-") and namespace != "docs-old"
+    assert stats["previous_namespace"] == "docs-old"
+    assert stats["upserted"] == 2500
+    assert len(stats["batches"]) == 3
+    with open(state_path) as f:
+        state = json.load(f)
+    assert state["active_namespace"] == namespace
+    assert state["previous_namespace"] == "docs-old"
+    assert state["vector_count"] == 2500
+    assert not os.path.exists(state_path + ".tmp")
+    assert index.deleted == ["docs-old"]
+    assert list(index.namespaces) == [namespace]
+    assert len(index.namespaces[namespace]) == 2500
+
+
+def test_reindex_can_keep_previous_namespace(sleeps, state_path):
+    index = FakeIndex(namespaces={"docs-old": {"doc-0": {}}})
+
+    stats = generate_embeddings.reindex_pinecone(make_records(10), index=index, state_path=state_path, keep_previous=True)
+
+    assert index.deleted == []
+    assert set(index.namespaces) == {"docs-old", stats["namespace"]}
+
+
+def test_reindex_without_state_starts_fresh(sleeps, tmp_path):
+    state_path = str(tmp_path / "pinecone_namespace.json")
+    index = FakeIndex()
+
+    stats = generate_embeddings.reindex_pinecone(make_records(10), index=index, state_path=state_path)
+
+    assert stats["previous_namespace"] is None
+    assert index.deleted == []
+    with open(state_path) as f:
+        assert json.load(f)["active_namespace"] == stats["namespace"]
+
+
+def test_failed_reindex_keeps_active_namespace(sleeps, state_path):
+    with open(state_path) as f:
+        before = f.read()
+    # The second batch is rejected outright
+    index = FakeIndex(
+        namespaces={"docs-old": {"doc-0": {}}},
+        fail=lambda batch, namespace: ApiError(400) if batch[0]["id"] == "doc-1000" else None
+    )
+
+    stats = generate_embeddings.reindex_pinecone(make_records(2500), index=index, state_path=state_path)
+
+    assert [failure["batch"] for failure in stats["failures"]] == [1]
+    assert "namespace" not in stats
+    with open(state_path) as f:
+        assert f.read() == before
+    # The partial namespace is removed and the active one left alone
+    partial = {namespace for namespace, _ in index.upserts}
+    assert len(partial) == 1 and "docs-old" not in partial
+    assert index.deleted == list(partial)
+    assert list(index.namespaces) == ["docs-old"]
+
+
+def test_failed_reindex_reports_upsert_errors_when_cleanup_fails(sleeps, state_path):
+    with open(state_path) as f:
+        before = f.read()
+    # Nothing is upserted, so the new namespace never exists and deleting it fails
+    index = FakeIndex(namespaces={"docs-old": {"doc-0": {}}}, fail=lambda batch, namespace: ApiError(400))
+
+    stats = generate_embeddings.reindex_pinecone(make_records(10), index=index, state_path=state_path)
+
+    assert [failure["error"] for failure in stats["failures"]] == ["HTTP 400"]
+    assert stats["cleanup_error"] == "HTTP 404"
+    with open(state_path) as f:
+        assert f.read() == before
+    assert list(index.namespaces) == ["docs-old"]
@@ -1,7 +1,9 @@
-from mcp.server.fastmcp import FastMCP
-import requests, os, time
+from mcp.server.fastmcp import FastMCP, Context
+import requests, os, time, mmap, uuid, threading, asyncio, math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from dotenv import load_dotenv
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
 import logging
 
 load_dotenv('.env')
@@ -20,6 +22,19 @@ ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
 
 VIMEO_API_BASE = "https://api.vimeo.com"
 
+# TUS chunk size used by upload_video_tus
+TUS_CHUNK_SIZE = 1048576  # 1MB chunks
+
+# Concurrency limits for bulk operations
+VIMEO_MAX_CONCURRENCY = int(os.getenv("VIMEO_MAX_CONCURRENCY", "8"))
+VIMEO_RATE_LIMIT_RESERVE = 5  # Calls left in the window before bulk work pauses until reset
+VIMEO_RATE_LIMIT_FALLBACK_WAIT = 60  # Seconds to wait when Vimeo sends no usable reset time
+VIMEO_BULK_RETRIES = 3  # Retries per item after a 429
+
+# Last rate-limit window reported by Vimeo
+_rate_limit = {"remaining": None, "reset_at": None}
+_rate_limit_lock = threading.Lock()
+
 # Headers for Vimeo API requests
 def get_headers():
     return {
@@ -42,29 +57,172 @@ def vimeo_request(method: str, endpoint: str, data: Dict = None, params: Dict =
             params=params
         )
         
+        _record_rate_limit(response)
+        
         if response.status_code >= 400:
-            return {"error": f"Vimeo API error {response.status_code}: {response.text}"}
+            return {"error": f"Vimeo API error {response.status_code}: {response.text}", "status_code": response.status_code}
         
         return response.json() if response.text else {"success": True}
     except Exception as e:
         return {"error": f"Request failed: {str(e)}"}
 
-# ===== VIDEO UPLOAD TOOLS =====
-
-@mcp.tool()
-def upload_video_tus(file_path: str, title: str = "", description: str = "", privacy: str = "unlisted") -> Dict:
+def _record_rate_limit(response: requests.Response):
+    """Remember the rate-limit window from Vimeo's X-RateLimit-* headers
+    
+    A 429 always closes the window: until X-RateLimit-Reset, else for Retry-After
+    seconds, else for VIMEO_RATE_LIMIT_FALLBACK_WAIT, so retries never go out at once.
     """
-    Upload a video to Vimeo using TUS protocol (for large files)
+    now = time.time()
+    if response.status_code == 429:
+        remaining = 0
+    else:
+        try:
+            remaining = int(response.headers["X-RateLimit-Remaining"])
+        except (KeyError, ValueError):
+            # No usable window, the request itself succeeded
+            return
     
-    Args:
-        file_path: Absolute path to the video file
-        title: Video title
-        description: Video description
-        privacy: Privacy setting (public, unlisted, private, password)
+    try:
+        reset_at = datetime.fromisoformat(response.headers.get("X-RateLimit-Reset", "")).timestamp()
+    except ValueError:
+        try:
+            reset_at = now + float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            reset_at = now + VIMEO_RATE_LIMIT_FALLBACK_WAIT
+    if response.status_code == 429:
+        # A reset time already in the past (e.g. clock skew) must still hold the retry back
+        reset_at = max(reset_at, now + 1)
+    
+    with _rate_limit_lock:
+        _rate_limit["remaining"] = remaining
+        _rate_limit["reset_at"] = reset_at
+
+def _wait_for_rate_limit():
+    """Reserve a call in the current rate-limit window, sleeping until reset when it is used up"""
+    while True:
+        with _rate_limit_lock:
+            remaining = _rate_limit["remaining"]
+            if remaining is None or remaining > VIMEO_RATE_LIMIT_RESERVE:
+                if remaining is not None:
+                    _rate_limit["remaining"] = remaining - 1
+                return
+            
+            delay = _rate_limit["reset_at"] - time.time()
+            if delay <= 0:
+                # Window has reset, the next response refreshes the counters
+                _rate_limit["remaining"] = None
+                return
         
-    Returns:
-        Upload result with video URI and upload status
-    """
+        logger.info(f"Vimeo rate limit nearly exhausted, waiting {delay:.0f}s for reset")
+        time.sleep(delay)
+
+def _clean_id(value: str) -> str:
+    return value.strip("/").split("/")[-1]
+
+def _bulk_folder_request(method: str, folder_id: str, video_ids: List[str], max_concurrency: int) -> Dict:
+    """Run one folder PUT/DELETE per video concurrently and summarise the results"""
+    folder_id = _clean_id(folder_id)
+    # Deduplicate while keeping the caller's order
+    video_ids = list(dict.fromkeys(_clean_id(video_id) for video_id in video_ids if video_id.strip("/")))
+    
+    if not video_ids:
+        return {"error": "No video IDs provided"}
+    
+    def run(video_id: str) -> Dict:
+        for _ in range(VIMEO_BULK_RETRIES + 1):
+            _wait_for_rate_limit()
+            response = vimeo_request(method, f"/me/folders/{folder_id}/videos/{video_id}")
+            if response.get("status_code") != 429:
+                break
+        
+        if "error" in response:
+            return {"video_id": video_id, "success": False, "error": response["error"]}
+        return {"video_id": video_id, "success": True}
+    
+    workers = max(1, min(max_concurrency, VIMEO_MAX_CONCURRENCY, len(video_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, video_ids))
+    
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "folder_id": folder_id,
+        "requested": len(video_ids),
+        "succeeded": succeeded,
+        "failed": len(video_ids) - succeeded,
+        "results": results
+    }
+
+# ===== TUS UPLOAD HELPERS =====
+
+class _MmapChunkReader:
+    """Read-only file-like window over an mmap, so requests streams a TUS chunk without copying it"""
+    
+    def __init__(self, buffer: mmap.mmap, start: int, end: int):
+        with memoryview(buffer) as view:
+            self._view = view[start:end]
+        self._pos = 0
+        self._block: Optional[memoryview] = None
+    
+    def __len__(self) -> int:
+        # requests uses this for Content-Length
+        return len(self._view) - self._pos
+    
+    def read(self, size: int = -1) -> memoryview:
+        # The previous block has already been sent, release it before handing out the next one
+        if self._block is not None:
+            self._block.release()
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        self._block = self._view[self._pos:end]
+        self._pos = end
+        return self._block
+    
+    def close(self):
+        # Drop every export of the mmap so it can be closed
+        if self._block is not None:
+            self._block.release()
+            self._block = None
+        self._view.release()
+
+def _tus_upload_chunks(upload_link: str, file_path: str, file_size: int, chunk_size: int = TUS_CHUNK_SIZE,
+                      on_progress: Optional[Callable[[int], None]] = None,
+                      cancel_event: Optional[threading.Event] = None) -> Dict:
+    """PATCH a file to a TUS upload link, serving each chunk from an mmap of the file"""
+    offset = 0
+    
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        while offset < file_size:
+            if cancel_event is not None and cancel_event.is_set():
+                return {"error": f"Upload cancelled at offset {offset}", "cancelled": True}
+            
+            patch_headers = {
+                "Authorization": f"Bearer {ACCESS_TOKEN}",
+                "Tus-Resumable": "1.0.0",
+                "Upload-Offset": str(offset),
+                "Content-Type": "application/offset+octet-stream"
+            }
+            
+            chunk = _MmapChunkReader(mapped, offset, min(offset + chunk_size, file_size))
+            try:
+                response = requests.patch(upload_link, headers=patch_headers, data=chunk)
+            except requests.RequestException as e:
+                return {"error": f"Upload failed at offset {offset}: {str(e)}"}
+            finally:
+                chunk.close()
+            
+            if response.status_code != 204:
+                return {"error": f"Upload failed at offset {offset}: {response.status_code}"}
+            
+            offset = int(response.headers.get("Upload-Offset", offset))
+            logger.info(f"Uploaded {offset}/{file_size} bytes ({offset*100//file_size}%)")
+            if on_progress is not None:
+                on_progress(offset)
+    
+    return {"success": True, "offset": offset}
+
+def _upload_video_tus(file_path: str, title: str, description: str, privacy: str,
+                      on_progress: Optional[Callable[[int], None]] = None,
+                      cancel_event: Optional[threading.Event] = None) -> Dict:
+    """Create a TUS upload session, upload the file and verify it (shared by the upload tools)"""
     if not os.path.exists(file_path):
         return {"error": f"File not found: {file_path}"}
     
@@ -96,29 +254,15 @@ def upload_video_tus(file_path: str, title: str = "", description: str = "", pri
         return {"error": "Failed to get upload link or video URI"}
     
     # Step 2: Upload the file in chunks
-    chunk_size = 1048576  # 1MB chunks
-    offset = 0
-    
     try:
-        with open(file_path, 'rb') as f:
-            while offset < file_size:
-                f.seek(offset)
-                data = f.read(chunk_size)
-                
-                patch_headers = {
-                    "Authorization": f"Bearer {ACCESS_TOKEN}",
-                    "Tus-Resumable": "1.0.0",
-                    "Upload-Offset": str(offset),
-                    "Content-Type": "application/offset+octet-stream"
-                }
-                
-                response = requests.patch(upload_link, headers=patch_headers, data=data)
-                
-                if response.status_code == 204:
-                    offset = int(response.headers.get("Upload-Offset", offset))
-                    logger.info(f"Uploaded {offset}/{file_size} bytes ({offset*100//file_size}%)")
-                else:
-                    return {"error": f"Upload failed at offset {offset}: {response.status_code}"}
+        upload_result = _tus_upload_chunks(upload_link, file_path, file_size,
+                                           on_progress=on_progress, cancel_event=cancel_event)
+        if upload_result.get("cancelled"):
+            # Don't leave an empty video behind on the account
+            vimeo_request("DELETE", video_uri)
+            return upload_result
+        if "error" in upload_result:
+            return upload_result
         
         # Verify upload completion
         head_headers = {
@@ -146,6 +290,217 @@ def upload_video_tus(file_path: str, title: str = "", description: str = "", pri
     
     return {"error": "Upload verification failed"}
 
+# ===== UPLOAD JOBS =====
+
+# Background TUS uploads started with start_video_upload, keyed by job ID
+UPLOAD_JOBS: Dict[str, Dict] = {}
+_upload_cancel_events: Dict[str, threading.Event] = {}
+_upload_jobs_lock = threading.Lock()
+
+UPLOAD_JOB_TTL = 3600  # Finished jobs are kept for an hour
+UPLOAD_PROGRESS_INTERVAL = 2  # Seconds between progress notifications
+UPLOAD_MAX_WAIT = 600  # Longest a single get_upload_job call may stream progress
+UPLOAD_FINISHED_STATUSES = ("complete", "failed", "cancelled")
+
+def _update_upload_job(job_id: str, **fields):
+    with _upload_jobs_lock:
+        UPLOAD_JOBS[job_id].update(fields)
+
+def _get_upload_job(job_id: str) -> Optional[Dict]:
+    with _upload_jobs_lock:
+        job = UPLOAD_JOBS.get(job_id)
+        return dict(job) if job else None
+
+def _prune_upload_jobs():
+    """Forget finished jobs older than UPLOAD_JOB_TTL"""
+    now = time.time()
+    with _upload_jobs_lock:
+        for job_id, job in list(UPLOAD_JOBS.items()):
+            if job.get("finished_at") and now - job["finished_at"] > UPLOAD_JOB_TTL:
+                UPLOAD_JOBS.pop(job_id, None)
+                _upload_cancel_events.pop(job_id, None)
+
+def _run_upload_job(job_id: str, file_path: str, title: str, description: str, privacy: str):
+    """Thread target for start_video_upload"""
+    total_bytes = UPLOAD_JOBS[job_id]["total_bytes"]
+    started_at = time.time()
+    _update_upload_job(job_id, status="uploading", started_at=started_at)
+    
+    def on_progress(bytes_sent: int):
+        elapsed = max(time.time() - started_at, 1e-6)
+        throughput = bytes_sent / elapsed
+        eta = (total_bytes - bytes_sent) / throughput if throughput else None
+        _update_upload_job(
+            job_id,
+            bytes_sent=bytes_sent,
+            throughput_bytes_per_sec=round(throughput),
+            eta_seconds=round(eta) if eta is not None else None
+        )
+    
+    try:
+        result = _upload_video_tus(file_path, title, description, privacy,
+                                   on_progress=on_progress, cancel_event=_upload_cancel_events[job_id])
+    except Exception as e:
+        result = {"error": f"Upload failed: {str(e)}"}
+    
+    if result.get("cancelled"):
+        _update_upload_job(job_id, status="cancelled", error=result["error"], finished_at=time.time())
+    elif "error" in result:
+        _update_upload_job(job_id, status="failed", error=result["error"], finished_at=time.time())
+    else:
+        _update_upload_job(
+            job_id,
+            status="complete",
+            video_id=result["video_id"],
+            video_uri=result["video_uri"],
+            eta_seconds=0,
+            finished_at=time.time()
+        )
+
+def _upload_progress_message(job: Dict) -> str:
+    total = job["total_bytes"]
+    percent = job["bytes_sent"] * 100 // total if total else 0
+    message = f"{job['status']}: {percent}% ({job['bytes_sent']}/{total} bytes"
+    if job.get("throughput_bytes_per_sec"):
+        message += f", {job['throughput_bytes_per_sec'] / 1048576:.1f} MB/s"
+    if job.get("eta_seconds") is not None and job["status"] == "uploading":
+        message += f", ETA {job['eta_seconds']}s"
+    return message + ")"
+
+# ===== VIDEO UPLOAD TOOLS =====
+
+@mcp.tool()
+def upload_video_tus(file_path: str, title: str = "", description: str = "", privacy: str = "unlisted") -> Dict:
+    """
+    Upload a video to Vimeo using TUS protocol (for large files)
+    
+    The call blocks until the upload finishes; use start_video_upload for
+    long uploads that should run in the background.
+    
+    Args:
+        file_path: Absolute path to the video file
+        title: Video title
+        description: Video description
+        privacy: Privacy setting (public, unlisted, private, password)
+        
+    Returns:
+        Upload result with video URI and upload status
+    """
+    return _upload_video_tus(file_path, title, description, privacy)
+
+@mcp.tool()
+def start_video_upload(file_path: str, title: str = "", description: str = "", privacy: str = "unlisted") -> Dict:
+    """
+    Start a background TUS upload and return a job handle immediately
+    
+    Args:
+        file_path: Absolute path to the video file
+        title: Video title
+        description: Video description
+        privacy: Privacy setting (public, unlisted, private, password)
+        
+    Returns:
+        Job ID to pass to get_upload_job or cancel_upload_job
+    """
+    if not os.path.exists(file_path):
+        return {"error": f"File not found: {file_path}"}
+    
+    file_size = os.path.getsize(file_path)
+    if file_size == 0:
+        return {"error": f"File is empty: {file_path}"}
+    
+    _prune_upload_jobs()
+    
+    job_id = uuid.uuid4().hex
+    with _upload_jobs_lock:
+        UPLOAD_JOBS[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "file_path": file_path,
+            "title": title or os.path.basename(file_path),
+            "total_bytes": file_size,
+            "bytes_sent": 0,
+            "throughput_bytes_per_sec": None,
+            "eta_seconds": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "video_id": None,
+            "video_uri": None,
+            "error": None
+        }
+        _upload_cancel_events[job_id] = threading.Event()
+    
+    threading.Thread(
+        target=_run_upload_job,
+        args=(job_id, file_path, title, description, privacy),
+        name=f"vimeo-upload-{job_id[:8]}",
+        daemon=True
+    ).start()
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "total_bytes": file_size,
+        "message": "Upload started. Use get_upload_job to follow progress."
+    }
+
+@mcp.tool()
+async def get_upload_job(job_id: str, ctx: Context, wait_seconds: int = 0) -> Dict:
+    """
+    Get the status of a background upload job
+    
+    While waiting, bytes sent, throughput and ETA are streamed as MCP
+    progress notifications.
+    
+    Args:
+        job_id: Job ID returned by start_video_upload
+        wait_seconds: Stream progress for up to this many seconds, or until the job finishes (max 600)
+        
+    Returns:
+        Job status with bytes sent, throughput, ETA and the video ID once complete
+    """
+    deadline = time.monotonic() + min(max(wait_seconds, 0), UPLOAD_MAX_WAIT)
+    
+    while True:
+        job = _get_upload_job(job_id)
+        if job is None:
+            return {"error": f"Upload job not found: {job_id}"}
+        
+        await ctx.report_progress(job["bytes_sent"], job["total_bytes"], message=_upload_progress_message(job))
+        
+        if job["status"] in UPLOAD_FINISHED_STATUSES or time.monotonic() >= deadline:
+            return job
+        
+        await asyncio.sleep(UPLOAD_PROGRESS_INTERVAL)
+
+@mcp.tool()
+def cancel_upload_job(job_id: str) -> Dict:
+    """
+    Cancel a background upload job
+    
+    The upload stops after the chunk in flight and the partial video is deleted.
+    
+    Args:
+        job_id: Job ID returned by start_video_upload
+        
+    Returns:
+        Cancellation status
+    """
+    job = _get_upload_job(job_id)
+    if job is None:
+        return {"error": f"Upload job not found: {job_id}"}
+    
+    if job["status"] in UPLOAD_FINISHED_STATUSES:
+        return {"error": f"Upload job {job_id} already {job['status']}"}
+    
+    _upload_cancel_events[job_id].set()
+    return {
+        "success": True,
+        "job_id": job_id,
+        "message": "Cancellation requested. The job stops after the current chunk."
+    }
+
 @mcp.tool()
 def upload_video_from_url(url: str, title: str, description: str = "", privacy: str = "unlisted") -> Dict:
     """
@@ -180,10 +535,108 @@ def upload_video_from_url(url: str, title: str, description: str = "", privacy:
     
     return response
 
+# ===== LISTING HELPERS =====
+
+# fields= projections so Vimeo only sends the keys the listing tools keep
+MY_VIDEOS_FIELDS = "uri,name,description,duration,created_time,privacy.view,link,stats.plays,transcode.status"
+FOLDER_VIDEOS_FIELDS = "uri,name,duration,created_time,privacy.view,transcode.status"
+
+def _simplify_my_video(video: Dict) -> Dict:
+    return {
+        "video_id": video.get("uri", "").split("/")[-1],
+        "title": video.get("name"),
+        "description": video.get("description"),
+        "duration": video.get("duration"),
+        "created_time": video.get("created_time"),
+        "privacy": video.get("privacy", {}).get("view"),
+        "link": video.get("link"),
+        "plays": video.get("stats", {}).get("plays", 0),
+        "status": video.get("transcode", {}).get("status", "unknown")
+    }
+
+def _simplify_folder_video(video: Dict) -> Dict:
+    return {
+        "video_id": video.get("uri", "").split("/")[-1],
+        "title": video.get("name"),
+        "duration": video.get("duration"),
+        "created_time": video.get("created_time"),
+        "privacy": video.get("privacy", {}).get("view"),
+        "status": video.get("transcode", {}).get("status", "unknown")
+    }
+
+def _page_count(total: int, per_page: int, max_pages: int) -> int:
+    return max(1, min(math.ceil(total / per_page), max_pages))
+
+def _iter_video_pages(endpoint: str, params: Dict, max_pages: int) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (page, response) for every page of a Vimeo listing as the pages arrive
+    
+    Page 1 is fetched first to learn the total, the remaining pages are fetched concurrently.
+    """
+    first = vimeo_request("GET", endpoint, params={**params, "page": 1})
+    yield 1, first
+    if "error" in first:
+        return
+    
+    last_page = _page_count(first.get("total", 0), params["per_page"], max_pages)
+    if last_page == 1:
+        return
+    
+    def fetch(page: int) -> Dict:
+        _wait_for_rate_limit()
+        return vimeo_request("GET", endpoint, params={**params, "page": page})
+    
+    pool = ThreadPoolExecutor(max_workers=min(VIMEO_MAX_CONCURRENCY, last_page - 1))
+    try:
+        futures = {pool.submit(fetch, page): page for page in range(2, last_page + 1)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+async def _collect_all_pages(ctx: Context, endpoint: str, params: Dict, max_pages: int,
+                             simplify: Callable[[Dict], Dict]) -> Dict:
+    """Walk every page of a listing, reporting progress per page, and return the videos in page order"""
+    params = {**params, "per_page": 100}
+    pages = _iter_video_pages(endpoint, params, max(max_pages, 1))
+    videos_by_page: Dict[int, List[Dict]] = {}
+    errors = []
+    total = 0
+    expected_pages = 1
+    
+    while True:
+        item = await asyncio.to_thread(next, pages, None)
+        if item is None:
+            break
+        
+        page, response = item
+        if "error" in response:
+            if page == 1:
+                return response
+            errors.append({"page": page, "error": response["error"]})
+        else:
+            if page == 1:
+                total = response.get("total", 0)
+                expected_pages = _page_count(total, params["per_page"], max_pages)
+            videos_by_page[page] = [simplify(video) for video in response.get("data", [])]
+        
+        done = len(videos_by_page) + len(errors)
+        await ctx.report_progress(done, expected_pages, message=f"Fetched page {page} ({done}/{expected_pages})")
+    
+    result = {
+        "total": total,
+        "pages_fetched": len(videos_by_page),
+        "videos": [video for page in sorted(videos_by_page) for video in videos_by_page[page]]
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
 # ===== VIDEO MANAGEMENT TOOLS =====
 
 @mcp.tool()
-def get_my_videos(page: int = 1, per_page: int = 25, sort: str = "date", direction: str = "desc") -> Dict:
+async def get_my_videos(ctx: Context, page: int = 1, per_page: int = 25, sort: str = "date", direction: str = "desc",
+                        all_pages: bool = False, max_pages: int = 50) -> Dict:
     """
     Get authenticated user's videos
     
@@ -192,6 +645,8 @@ def get_my_videos(page: int = 1, per_page: int = 25, sort: str = "date", directi
         per_page: Number of items per page (max 100)
         sort: Sort field (date, alphabetical, plays, likes, comments, duration)
         direction: Sort direction (asc, desc)
+        all_pages: Fetch every page concurrently (100 per page), reporting progress as pages arrive
+        max_pages: Maximum pages to fetch when all_pages is set
         
     Returns:
         List of user's videos with metadata
@@ -200,26 +655,18 @@ def get_my_videos(page: int = 1, per_page: int = 25, sort: str = "date", directi
         "page": page,
         "per_page": min(per_page, 100),
         "sort": sort,
-        "direction": direction
+        "direction": direction,
+        "fields": MY_VIDEOS_FIELDS
     }
     
-    response = vimeo_request("GET", "/me/videos", params=params)
+    if all_pages:
+        return await _collect_all_pages(ctx, "/me/videos", params, max_pages, _simplify_my_video)
+    
+    response = await asyncio.to_thread(vimeo_request, "GET", "/me/videos", params=params)
     
     if "error" not in response and "data" in response:
         # Simplify the response with key information
-        videos = []
-        for video in response.get("data", []):
-            videos.append({
-                "video_id": video.get("uri", "").split("/")[-1],
-                "title": video.get("name"),
-                "description": video.get("description"),
-                "duration": video.get("duration"),
-                "created_time": video.get("created_time"),
-                "privacy": video.get("privacy", {}).get("view"),
-                "link": video.get("link"),
-                "plays": video.get("stats", {}).get("plays", 0),
-                "status": video.get("transcode", {}).get("status", "unknown")
-            })
+        videos = [_simplify_my_video(video) for video in response.get("data", [])]
         
         return {
             "total": response.get("total", 0),
@@ -266,6 +713,94 @@ def get_video_details(video_id: str) -> Dict:
     
     return response
 
+# Adaptive polling for watch_transcode_status
+TRANSCODE_FINISHED_STATUSES = ("complete", "error")
+TRANSCODE_POLL_MIN = 5  # Seconds between polls right after a status change
+TRANSCODE_POLL_MAX = 60  # Backoff ceiling while nothing changes
+TRANSCODE_POLL_BACKOFF = 1.5
+TRANSCODE_MAX_WAIT = 1800
+
+def _fetch_transcode_statuses(video_ids: List[str]) -> Dict[str, Dict]:
+    """Fetch only transcode.status for each video, concurrently"""
+    def fetch(video_id: str) -> Tuple[str, Dict]:
+        _wait_for_rate_limit()
+        return video_id, vimeo_request("GET", f"/videos/{video_id}", params={"fields": "transcode.status"})
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(VIMEO_MAX_CONCURRENCY, len(video_ids)))) as pool:
+        return dict(pool.map(fetch, video_ids))
+
+@mcp.tool()
+async def watch_transcode_status(video_ids: List[str], ctx: Context, timeout_seconds: int = 600) -> Dict:
+    """
+    Wait for transcoding to finish on one or more videos
+    
+    Polls only transcode.status, backing off while nothing changes, and sends an
+    MCP progress notification as each video finishes.
+    
+    Args:
+        video_ids: List of video IDs or URIs
+        timeout_seconds: Maximum time to wait (max 1800)
+        
+    Returns:
+        Final status of finished videos and last known status of the rest
+    """
+    video_ids = list(dict.fromkeys(_clean_id(video_id) for video_id in video_ids if video_id.strip("/")))
+    if not video_ids:
+        return {"error": "No video IDs provided"}
+    
+    deadline = time.monotonic() + min(max(timeout_seconds, 0), TRANSCODE_MAX_WAIT)
+    finished: Dict[str, str] = {}
+    last_status: Dict[str, Optional[str]] = {}
+    errors: Dict[str, str] = {}
+    interval = TRANSCODE_POLL_MIN
+    polls = 0
+    
+    while True:
+        pending = [video_id for video_id in video_ids if video_id not in finished]
+        responses = await asyncio.to_thread(_fetch_transcode_statuses, pending)
+        polls += 1
+        changed = False
+        
+        for video_id, response in responses.items():
+            if "error" in response:
+                if response.get("status_code") == 404:
+                    finished[video_id] = "not_found"
+                    changed = True
+                else:
+                    errors[video_id] = response["error"]
+                continue
+            
+            errors.pop(video_id, None)
+            status = response.get("transcode", {}).get("status")
+            if status != last_status.get(video_id):
+                changed = True
+            last_status[video_id] = status
+            
+            if status in TRANSCODE_FINISHED_STATUSES:
+                finished[video_id] = status
+        
+        for video_id in pending:
+            if video_id in finished:
+                await ctx.report_progress(len(finished), len(video_ids), message=f"Video {video_id}: {finished[video_id]}")
+        
+        remaining = deadline - time.monotonic()
+        if len(finished) == len(video_ids) or remaining <= 0:
+            break
+        
+        # Poll quickly after a change, back off while everything is still processing
+        interval = TRANSCODE_POLL_MIN if changed else min(interval * TRANSCODE_POLL_BACKOFF, TRANSCODE_POLL_MAX)
+        await asyncio.sleep(min(interval, remaining))
+    
+    result = {
+        "all_finished": len(finished) == len(video_ids),
+        "finished": finished,
+        "pending": {video_id: last_status.get(video_id) for video_id in video_ids if video_id not in finished},
+        "polls": polls
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
 @mcp.tool()
 def update_video(video_id: str, title: str = None, description: str = None, privacy: str = None) -> Dict:
     """
@@ -433,7 +968,42 @@ def remove_video_from_folder(folder_id: str, video_id: str) -> Dict:
     return response
 
 @mcp.tool()
-def get_folder_videos(folder_id: str, page: int = 1, per_page: int = 25) -> Dict:
+async def bulk_add_videos_to_folder(folder_id: str, video_ids: List[str], max_concurrency: int = 8) -> Dict:
+    """
+    Add many videos to a folder concurrently
+    
+    Requests are throttled against Vimeo's rate-limit headers and retried after a 429.
+    
+    Args:
+        folder_id: Folder ID or URI
+        video_ids: List of video IDs or URIs
+        max_concurrency: Maximum requests in flight (capped by VIMEO_MAX_CONCURRENCY)
+        
+    Returns:
+        Counts of succeeded and failed items with a per-video result
+    """
+    return await asyncio.to_thread(_bulk_folder_request, "PUT", folder_id, video_ids, max_concurrency)
+
+@mcp.tool()
+async def bulk_remove_videos_from_folder(folder_id: str, video_ids: List[str], max_concurrency: int = 8) -> Dict:
+    """
+    Remove many videos from a folder concurrently
+    
+    Requests are throttled against Vimeo's rate-limit headers and retried after a 429.
+    
+    Args:
+        folder_id: Folder ID or URI
+        video_ids: List of video IDs or URIs
+        max_concurrency: Maximum requests in flight (capped by VIMEO_MAX_CONCURRENCY)
+        
+    Returns:
+        Counts of succeeded and failed items with a per-video result
+    """
+    return await asyncio.to_thread(_bulk_folder_request, "DELETE", folder_id, video_ids, max_concurrency)
+
+@mcp.tool()
+async def get_folder_videos(folder_id: str, ctx: Context, page: int = 1, per_page: int = 25,
+                            all_pages: bool = False, max_pages: int = 50) -> Dict:
     """
     Get videos in a specific folder
     
@@ -441,6 +1011,8 @@ def get_folder_videos(folder_id: str, page: int = 1, per_page: int = 25) -> Dict
         folder_id: Folder ID or URI
         page: Page number
         per_page: Number of items per page
+        all_pages: Fetch every page concurrently (100 per page), reporting progress as pages arrive
+        max_pages: Maximum pages to fetch when all_pages is set
         
     Returns:
         List of videos in the folder
@@ -448,22 +1020,20 @@ def get_folder_videos(folder_id: str, page: int = 1, per_page: int = 25) -> Dict
     folder_id = folder_id.strip("/").split("/")[-1]
     params = {
         "page": page,
-        "per_page": min(per_page, 100)
+        "per_page": min(per_page, 100),
+        "fields": FOLDER_VIDEOS_FIELDS
     }
     
-    response = vimeo_request("GET", f"/me/folders/{folder_id}/videos", params=params)
+    if all_pages:
+        result = await _collect_all_pages(ctx, f"/me/folders/{folder_id}/videos", params, max_pages, _simplify_folder_video)
+        if "error" not in result:
+            result = {"folder_id": folder_id, **result}
+        return result
+    
+    response = await asyncio.to_thread(vimeo_request, "GET", f"/me/folders/{folder_id}/videos", params=params)
     
     if "error" not in response and "data" in response:
-        videos = []
-        for video in response.get("data", []):
-            videos.append({
-                "video_id": video.get("uri", "").split("/")[-1],
-                "title": video.get("name"),
-                "duration": video.get("duration"),
-                "created_time": video.get("created_time"),
-                "privacy": video.get("privacy", {}).get("view"),
-                "status": video.get("transcode", {}).get("status", "unknown")
-            })
+        videos = [_simplify_folder_video(video) for video in response.get("data", [])]
         
         return {
             "folder_id": folder_id,